@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+This module moves the formatting and writing of log records off the
+logging thread.
+
+The logging thread only puts its records in a bounded queue. A listener
+thread takes them out in batches, formats them with the formatter of the
+target handler (for get_logger, the redaction of RedactingFormatter)
+and writes each batch to the stream of that handler at once.
+
+Classes:
+    BoundedQueueHandler(maxsize, overflow)
+        Puts records in a bounded queue. When it is full, "block" waits
+        for room, "drop_newest" drops the record and "drop_oldest" drops
+        the oldest queued one; dropped counts the records lost.
+    BatchingListener(queue, handler, batch_size)
+        Formats and writes the queued records, up to batch_size at a
+        time; stop() writes what is left in the queue.
+"""
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Optional
+
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler with a bounded queue and an overflow policy."""
+
+    def __init__(self, maxsize: int, overflow: str = "block"):
+        """Creates the handler and its queue.
+
+        Args:
+            maxsize (int): Records the queue holds.
+            overflow (str): One of OVERFLOW_POLICIES.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("overflow must be one of {}".format(
+                ", ".join(OVERFLOW_POLICIES)))
+        super().__init__(queue.Queue(maxsize))
+        self.overflow = overflow
+        self.dropped = 0
+        # Several logging threads may overflow at once
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merges the arguments into the message, as they may change
+        before the listener formats the record; unlike QueueHandler, the
+        record is neither copied nor formatted here."""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """Queues a record, applying the overflow policy when full."""
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                if self.overflow == "drop_newest":
+                    self._count_dropped()
+                    return
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                # Drained by the listener in the meantime
+                continue
+            self._count_dropped()
+
+    def _count_dropped(self):
+        """Counts one record lost to the overflow policy."""
+        with self._dropped_lock:
+            self.dropped += 1
+
+
+class BatchingListener:
+    """Thread writing the queued records in batches."""
+
+    _STOP = object()
+
+    def __init__(self, record_queue: queue.Queue,
+                 handler: logging.StreamHandler, batch_size: int = 256):
+        """Prepares the listener; start() starts its thread.
+
+        Args:
+            record_queue (queue.Queue): The queue of a BoundedQueueHandler.
+            handler (logging.StreamHandler): Gives the formatter, the
+                stream and the terminator of the records.
+            batch_size (int): Records written at most at a time.
+        """
+        self.queue = record_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Starts the listener thread."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Writes the records still queued and stops the thread."""
+        if self._thread is None:
+            return
+        # Waits for room even when the queue is full
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        """Formats and writes batches until stopped."""
+        while True:
+            batch = []
+            record = self.queue.get()
+            while record is not self._STOP:
+                batch.append(record)
+                if len(batch) == self.batch_size:
+                    break
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._write(batch)
+            if record is self._STOP:
+                return
+
+    def _write(self, records: list):
+        """Writes formatted records with a single write and flush."""
+        handler = self.handler
+        lines = []
+        for record in records:
+            if record.levelno < handler.level:
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        if not lines:
+            return
+        with handler.lock:
+            try:
+                handler.stream.write("".join(lines))
+                handler.flush()
+            except Exception:
+                handler.handleError(records[-1])
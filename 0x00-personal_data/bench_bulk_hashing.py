@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Throughput of hash_passwords for 1 process up to the number of CPUs,
+against hashing one password at a time.
+
+Usage: ./bench_bulk_hashing.py [passwords] [cost]    (default: 512 8)
+"""
+import os
+import sys
+import time
+
+import bcrypt
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+# Set before the import: encrypt_password calibrates without it
+os.environ["BCRYPT_COST"] = sys.argv[2] if len(sys.argv) > 2 else "8"
+hash_password = __import__('encrypt_password').hash_password
+hash_passwords = __import__('hashing_service').hash_passwords
+passwords = ["password{}".format(i) for i in range(count)]
+
+start = time.perf_counter()
+for password in passwords:
+    hash_password(password)
+baseline = count / (time.perf_counter() - start)
+print("one at a time: {:8.1f} hashes/s".format(baseline))
+
+workers = 1
+while True:
+    start = time.perf_counter()
+    hashes = list(hash_passwords(passwords, workers, chunk_size=16))
+    throughput = count / (time.perf_counter() - start)
+    assert bcrypt.checkpw(passwords[-1].encode(), hashes[-1])
+    print("{:>2} processes:  {:8.1f} hashes/s  (x{:.2f})".format(
+        workers, throughput, throughput / baseline))
+    if workers >= (os.cpu_count() or 1):
+        break
+    workers = min(2 * workers, os.cpu_count())
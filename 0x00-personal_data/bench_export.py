@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Export of a users table, row by row through a redacting logger as main()
+does, against export_rows in batches, on a SQLite stand-in seeded from
+user_data.csv. Reports rows/s and the peak of traced memory.
+
+Usage: ./bench_export.py [rows] [batch size]    (default: 200000 1000)
+"""
+import csv
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from redaction import Redactor
+from user_export import LINE_FORMAT, export_rows
+
+PII_FIELDS = ("name", "email", "phone", "ssn", "password")
+
+
+class RedactingFormatter(logging.Formatter):
+    """filtered_logger.RedactingFormatter, which needs mysql-connector to
+    be imported"""
+
+    def __init__(self, fields):
+        super().__init__(LINE_FORMAT)
+        self.redactor = Redactor(fields, "***", ";")
+
+    def format(self, record):
+        return self.redactor.redact(super().format(record))
+
+
+def log_rows(cursor, stream) -> int:
+    """main() without export: one log call per row"""
+    logger = logging.getLogger("user_data_bench")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(RedactingFormatter(PII_FIELDS))
+    logger.handlers = [handler]
+    cursor.execute("SELECT * FROM users;")
+    columns = [col[0] for col in cursor.description]
+    count = 0
+    for row in cursor:
+        row_data = "; ".join(f"{col}={val}" for col, val in zip(columns, row))
+        logger.info(row_data.strip())
+        count += 1
+    return count
+
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+db_path = os.path.join(tempfile.mkdtemp(), "users.sqlite3")
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       "user_data.csv")) as f:
+    seed = list(csv.reader(f))
+db = sqlite3.connect(db_path)
+db.execute("CREATE TABLE users ({})".format(
+    ", ".join("{} TEXT".format(col) for col in seed[0])))
+db.executemany("INSERT INTO users VALUES ({})".format(
+    ", ".join("?" * len(seed[0]))),
+    (seed[1 + i % (len(seed) - 1)] for i in range(rows)))
+db.commit()
+
+for label, export in (
+        ("row by row", log_rows),
+        ("batches of {}".format(batch_size),
+         lambda cursor, stream: export_rows(
+             cursor, "SELECT * FROM users;", stream, PII_FIELDS,
+             batch_size))):
+    with open(os.devnull, "w") as stream:
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = export(db.cursor(), stream)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert count == rows
+    print("{:<18} {:10.0f} rows/s   peak {:8.1f} KiB".format(
+        label, rows / elapsed, peak / 1024))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Throughput of bcrypt verifications through HashingService for several
+pool sizes, and the number of calls of a burst rejected once the queue
+is full.
+
+Usage: ./bench_hashing.py [verifications] [cost]    (default: 64 10)
+"""
+import os
+import sys
+import time
+
+import bcrypt
+
+
+verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+cost = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+# Set before the import: encrypt_password calibrates without it
+os.environ["BCRYPT_COST"] = str(cost)
+HashingService = __import__('hashing_service').HashingService
+Overloaded = __import__('hashing_service').Overloaded
+hashed = bcrypt.hashpw(b"MyAmazingPassw0rd", bcrypt.gensalt(cost))
+
+for workers in (1, 2, 4, 8):
+    service = HashingService(workers, max_pending=verifications)
+    start = time.perf_counter()
+    futures = [service.submit(bcrypt.checkpw, b"MyAmazingPassw0rd", hashed)
+               for _ in range(verifications)]
+    assert all(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+
+    # Overload: a burst twice as large as the pool and its queue
+    small = HashingService(workers, max_pending=workers)
+    rejected = 0
+    accepted = []
+    for _ in range(4 * workers):
+        try:
+            accepted.append(small.submit(bcrypt.checkpw,
+                                         b"MyAmazingPassw0rd", hashed))
+        except Overloaded:
+            rejected += 1
+    for future in accepted:
+        future.result()
+    print("{} workers: {:7.1f} verifications/s   burst of {}: {} rejected"
+          .format(workers, verifications / elapsed, 4 * workers, rejected))
+    service.shutdown()
+    small.shutdown()
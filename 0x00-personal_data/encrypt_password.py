@@ -8,15 +8,42 @@ Functions:
         Hashes a plain text password with a randomly generated salt and returns
         the hashed password as a byte string.
 
-    is_valid(hashed_password: bytes, password: str) -> bool
+    is_valid(hashed_password: bytes, password: str, rehash=None) -> bool
         Validates a plain text password against a previously hashed password,
-        returning True if they match and False otherwise.
+        returning True if they match and False otherwise. When they match
+        and the hash has a lower cost than the target one, rehash is called
+        with a new hash of the password.
+
+    calibrate(budget_ms: float) -> dict
+        Measures the hashing time of each bcrypt cost from MIN_COST and
+        picks the highest one whose median stays within budget_ms as the
+        target cost.
+
+The target cost is BCRYPT_COST if set (4 to 31), otherwise it is
+calibrated against BCRYPT_BUDGET_MS (default: 250 ms) by a thread started
+when the module is imported, so the first hash does not pay for it.
+calibration() reports it with the measured latencies; a warning is
+logged when even MIN_COST exceeds the budget.
 
 This module is intended for securely handling
 password storage and verification.
 """
+import logging
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from typing import Callable, Optional
 import bcrypt
 
+# Lowest and highest costs considered by calibrate(): whatever the
+# hardware, hashes never get cheaper than MIN_COST, the bcrypt default
+MIN_COST = 12
+MAX_COST = 16
+_calibration = None
+_calibration_lock = threading.Lock()
+
 
 def hash_password(password: str) -> bytes:
     """Hashes a password with a salt using bcrypt.
@@ -27,23 +54,126 @@ def hash_password(password: str) -> bytes:
     Returns:
         bytes: The salted, hashed password.
     """
-    # Generate a salt
-    salt = bcrypt.gensalt()
+    # Generate a salt with the target cost
+    salt = bcrypt.gensalt(target_cost())
 
     # Hash the password using bcrypt and return the hashed password
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password
 
 
-def is_valid(hashed_password: bytes, password: str) -> bool:
+def is_valid(hashed_password: bytes, password: str,
+             rehash: Optional[Callable[[bytes], None]] = None) -> bool:
     """Checks if a password matches the hashed password.
 
     Args:
         hashed_password (bytes): The hashed password to check against.
         password (str): The plain text password to validate.
+        rehash (callable): Called with a hash of the password at the
+            target cost when the password matches a hash of a lower cost,
+            to store it in place of the former one. Hashes of a higher
+            cost are kept: rehashing never weakens them.
 
     Returns:
         bool: True if the password matches the hashed password,
             False otherwise.
     """
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+    if not bcrypt.checkpw(password.encode('utf-8'), hashed_password):
+        return False
+    if rehash is not None and hash_cost(hashed_password) < target_cost():
+        rehash(hash_password(password))
+    return True
+
+
+def hash_cost(hashed_password: bytes) -> int:
+    """Returns the cost of a bcrypt hash ($2b$<cost>$...)."""
+    return int(hashed_password.split(b'$')[2])
+
+
+def calibrate(budget_ms: float, samples: int = 3) -> dict:
+    """Measures bcrypt hashing at increasing costs.
+
+    Args:
+        budget_ms (float): Latency budget of one hash, in milliseconds.
+        samples (int): Hashes timed per cost.
+
+    Returns:
+        dict: The highest cost whose median hashing time fits the budget
+            (MIN_COST if none does), the budget and the median time of
+            each measured cost, in milliseconds.
+    """
+    latencies = {}
+    cost = MIN_COST
+    for rounds in range(MIN_COST, MAX_COST + 1):
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds))
+            timings.append((time.perf_counter() - start) * 1000)
+        latencies[rounds] = statistics.median(timings)
+        if latencies[rounds] > budget_ms:
+            break
+        cost = rounds
+        # The next cost takes about twice as long: only measure it when
+        # it may still fit
+        if 2 * latencies[rounds] > budget_ms * 1.5:
+            break
+    return {"cost": cost, "budget_ms": budget_ms, "latencies_ms": latencies,
+            "within_budget": latencies[cost] <= budget_ms}
+
+
+def calibration() -> dict:
+    """Returns the target cost and how it was chosen, calibrating it
+    on first use unless BCRYPT_COST is set."""
+    global _calibration
+    with _calibration_lock:
+        if _calibration is None:
+            _calibration = _configured_cost()
+        if _calibration is None:
+            try:
+                budget_ms = float(os.getenv("BCRYPT_BUDGET_MS", "250"))
+            except ValueError:
+                budget_ms = 250
+            _calibration = calibrate(budget_ms)
+            if not _calibration["within_budget"]:
+                logging.getLogger(__name__).warning(
+                    "bcrypt cost %d takes %.0f ms, over the budget of "
+                    "%.0f ms (BCRYPT_BUDGET_MS): hashes are kept at it",
+                    MIN_COST, _calibration["latencies_ms"][MIN_COST],
+                    budget_ms)
+        return _calibration
+
+
+def _configured_cost() -> Optional[dict]:
+    """calibration() for a valid BCRYPT_COST, None without one."""
+    try:
+        cost = int(os.getenv("BCRYPT_COST", "0"))
+    except ValueError:
+        cost = 0
+    if not 4 <= cost <= 31:
+        if os.getenv("BCRYPT_COST"):
+            logging.getLogger(__name__).warning(
+                "Invalid BCRYPT_COST %r: calibrated instead",
+                os.getenv("BCRYPT_COST"))
+        return None
+    return {"cost": cost, "budget_ms": None, "latencies_ms": {},
+            "within_budget": True}
+
+
+def target_cost() -> int:
+    """Returns the bcrypt cost of new hashes."""
+    return calibration()["cost"]
+
+
+if __name__ != "__main__" and multiprocessing.parent_process() is None:
+    # Off the first request; hashes wait for it if it is still running.
+    # Not in the workers of hash_passwords, which get the cost
+    threading.Thread(target=calibration, daemon=True).start()
+
+
+if __name__ == "__main__":
+    result = calibration()
+    for rounds, latency in result["latencies_ms"].items():
+        print("cost {:>2}: {:8.1f} ms".format(rounds, latency))
+    print("target cost: {} (budget: {} ms)".format(result["cost"],
+                                                   result["budget_ms"]))
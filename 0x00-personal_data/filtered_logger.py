@@ -6,14 +6,23 @@ is configured to redact specific fields marked as PII (Personally
 Identifiable Information) such as name, email, phone, SSN, and password.
 """
 import re
+import atexit
 import logging
 import os
+import sys
+import threading
 import mysql.connector
 from mysql.connector import connection
 from typing import List
+from redaction import Redactor
+from async_logging import (OVERFLOW_POLICIES, BatchingListener,
+                           BoundedQueueHandler)
+from user_export import export_rows
 # Define fields that should be considered as Personally
 # Identifiable Information (PII)
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
+# Serializes the configuration of the logger by get_logger
+_logger_lock = threading.Lock()
 
 
 def filter_datum(
@@ -38,25 +47,68 @@ def filter_datum(
     return re.sub(pattern, r'\1={}'.format(redaction), message)
 
 
+def _env_int(name: str, default: int) -> int:
+    """
+    Returns the integer value of an environment variable, or default
+    if it is unset or not an integer.
+    """
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
 def get_logger() -> logging.Logger:
     """
     Configures and returns a logger that redacts specified PII fields
     in log messages. Logs are restricted to the INFO level and do not
-    propagate to other loggers.
+    propagate to other loggers. The logger is configured on the first
+    call only; later calls return it as is.
+
+    Environment Variables:
+        PERSONAL_DATA_LOG_QUEUE_SIZE (int): When set above 0, the logger
+            only queues its records, and a background thread redacts and
+            writes them in batches (default: 0, synchronous).
+        PERSONAL_DATA_LOG_OVERFLOW (str): What logging does when the
+            queue is full: "block", "drop_newest" or "drop_oldest"
+            (default: 'block').
+        PERSONAL_DATA_LOG_BATCH_SIZE (int): Records written at most at a
+            time by the background thread (default: 256).
 
     Returns:
         logging.Logger: Configured logger for user data.
     """
     logger = logging.getLogger("user_data")
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
-
-    # Configure stream handler with redacting formatter
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(RedactingFormatter(fields=PII_FIELDS))
-    logger.addHandler(stream_handler)
-
-    return logger
+    with _logger_lock:
+        if logger.handlers:
+            # Already configured: another handler would write every record
+            # once more, and another listener thread would start
+            return logger
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        # Configure stream handler with redacting formatter
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(RedactingFormatter(fields=PII_FIELDS))
+
+        queue_size = _env_int("PERSONAL_DATA_LOG_QUEUE_SIZE", 0)
+        if queue_size <= 0:
+            logger.addHandler(stream_handler)
+            return logger
+
+        overflow = os.getenv("PERSONAL_DATA_LOG_OVERFLOW", "block")
+        if overflow not in OVERFLOW_POLICIES:
+            overflow = "block"
+        batch_size = _env_int("PERSONAL_DATA_LOG_BATCH_SIZE", 256)
+        queue_handler = BoundedQueueHandler(queue_size, overflow)
+        listener = BatchingListener(
+            queue_handler.queue, stream_handler,
+            batch_size if batch_size > 0 else 256)
+        listener.start()
+        # Write the records still queued when the program exits
+        atexit.register(listener.stop)
+        logger.addHandler(queue_handler)
+        return logger
 
 
 def get_db() -> connection.MySQLConnection:
@@ -96,8 +148,25 @@ def main() -> None:
     with filtered sensitive information. Connects to the database,
     retrieves all rows from the users table, and logs each row
     using a redacted format for PII fields.
+
+    Environment Variables:
+        PERSONAL_DATA_EXPORT_BATCH_SIZE (int): When set above 0, the rows
+            are streamed from an unbuffered cursor, and redacted and
+            written to stderr this many at a time (default: 0, one log
+            call per row).
     """
     db = get_db()
+    batch_size = _env_int("PERSONAL_DATA_EXPORT_BATCH_SIZE", 0)
+    if batch_size > 0:
+        # Rows are read from the server as they are fetched
+        cursor = db.cursor(buffered=False)
+        export_rows(cursor, "SELECT * FROM users;", sys.stderr,
+                    PII_FIELDS, batch_size)
+        sys.stderr.flush()
+        cursor.close()
+        db.close()
+        return
+
     cursor = db.cursor()
 
     # Retrieve all rows from users table
@@ -142,6 +211,8 @@ class RedactingFormatter(logging.Formatter):
         """
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        # Compiled once instead of on every record by filter_datum
+        self.redactor = Redactor(fields, self.REDACTION, self.SEPARATOR)
 
     def format(self, record: logging.LogRecord) -> str:
         """
@@ -157,8 +228,7 @@ class RedactingFormatter(logging.Formatter):
         """
         """Format the record message, filtering sensitive fields"""
         original_message: str = super().format(record)
-        return filter_datum(
-            self.fields, self.REDACTION, original_message, self.SEPARATOR)
+        return self.redactor.redact(original_message)
 
 
 if __name__ == "__main__":
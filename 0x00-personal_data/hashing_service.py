@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+This module runs the bcrypt work of encrypt_password on a bounded
+pool of threads.
+
+bcrypt releases the GIL while it hashes, so a threaded server can
+verify several logins in parallel instead of blocking each request
+worker for the whole cost of a hash. The number of calls waiting for
+a worker is bounded too: past it, new calls are rejected with
+Overloaded instead of queueing behind seconds of hashing.
+
+Classes:
+    HashingService(workers, max_pending)
+        hash_password / is_valid block until the result is ready,
+        hash_password_async / is_valid_async can be awaited from an
+        asyncio event loop.
+
+Functions:
+    default_service() -> HashingService
+        The shared service, sized by the HASHING_WORKERS (default: the
+        number of CPUs) and HASHING_QUEUE_SIZE (default: 4 per worker)
+        environment variables.
+
+    hash_passwords(passwords, workers, chunk_size, progress) -> Iterator
+        Hashes a stream of passwords (bulk user imports) on a pool of
+        processes, yielding the hashes in order; only a few chunks per
+        process are in flight, so memory stays bounded.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+import os
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import bcrypt
+
+import encrypt_password
+
+
+class Overloaded(Exception):
+    """Raised when every worker is busy and the queue is full."""
+
+
+class HashingService:
+    """Bounded thread pool for bcrypt hashing and verification."""
+
+    def __init__(self, workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        """Starts the pool.
+
+        Args:
+            workers (int): Number of threads, the number of CPUs by
+                default.
+            max_pending (int): Calls allowed to wait for a thread, 4 per
+                worker by default.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = 4 * self.workers if max_pending is None \
+            else max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="bcrypt")
+        # One slot per call running or waiting
+        self._slots = threading.BoundedSemaphore(
+            self.workers + self.max_pending)
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Schedules func(*args) on the pool.
+
+        Raises:
+            Overloaded: If all the workers and queue slots are taken.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise Overloaded("{} bcrypt calls already pending".format(
+                self.workers + self.max_pending))
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash_password(self, password: str,
+                      timeout: Optional[float] = None) -> bytes:
+        """Hashes a password on the pool, see
+        encrypt_password.hash_password."""
+        return self.submit(encrypt_password.hash_password,
+                           password).result(timeout)
+
+    def is_valid(self, hashed_password: bytes, password: str,
+                 timeout: Optional[float] = None,
+                 rehash: Optional[Callable] = None) -> bool:
+        """Checks a password on the pool, see encrypt_password.is_valid."""
+        return self.submit(encrypt_password.is_valid, hashed_password,
+                           password, rehash).result(timeout)
+
+    async def hash_password_async(self, password: str) -> bytes:
+        """Hashes a password on the pool without blocking the event
+        loop."""
+        return await asyncio.wrap_future(
+            self.submit(encrypt_password.hash_password, password))
+
+    async def is_valid_async(self, hashed_password: bytes, password: str,
+                             rehash: Optional[Callable] = None) -> bool:
+        """Checks a password on the pool without blocking the event
+        loop."""
+        return await asyncio.wrap_future(
+            self.submit(encrypt_password.is_valid, hashed_password,
+                        password, rehash))
+
+    def shutdown(self, wait: bool = True):
+        """Stops the pool once the pending calls are done."""
+        self._executor.shutdown(wait=wait)
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def default_service() -> HashingService:
+    """Returns the shared service, started on first use."""
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            # 0 workers: the default too
+            _default_service = HashingService(
+                _env_int("HASHING_WORKERS") or None,
+                _env_int("HASHING_QUEUE_SIZE"))
+        return _default_service
+
+
+def _env_int(name: str) -> Optional[int]:
+    """Value of a size environment variable, None (the default of
+    HashingService) if it is unset, not an integer or negative."""
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return None
+    return value if value >= 0 else None
+
+
+def _hash_chunk(passwords: List[str], cost: int) -> List[bytes]:
+    """Hashes a chunk of passwords in a worker process."""
+    return [bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(cost))
+            for password in passwords]
+
+
+def hash_passwords(passwords: Iterable[str], workers: Optional[int] = None,
+                   chunk_size: int = 64,
+                   progress: Optional[Callable[[int], None]] = None
+                   ) -> Iterator[bytes]:
+    """Hashes passwords on all the CPUs.
+
+    Args:
+        passwords (iterable): The plain text passwords, read lazily.
+        workers (int): Number of processes, the number of CPUs by default.
+        chunk_size (int): Passwords sent to a process at a time.
+        progress (callable): Called with the number of passwords hashed so
+            far after each chunk.
+
+    Yields:
+        bytes: The hash of each password at the target cost of
+            encrypt_password, in the order of the passwords.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Calibrated once here rather than in every process
+    cost = encrypt_password.target_cost()
+    passwords = iter(passwords)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Two chunks per process keep them busy while results are read
+        window = deque()
+        while True:
+            while len(window) < 2 * workers:
+                chunk = list(islice(passwords, chunk_size))
+                if not chunk:
+                    break
+                window.append(executor.submit(_hash_chunk, chunk, cost))
+            if not window:
+                return
+            hashes = window.popleft().result()
+            done += len(hashes)
+            yield from hashes
+            if progress is not None:
+                progress(done)
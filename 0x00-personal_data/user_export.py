@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+This module streams the rows of a query to a text stream in the format
+of the user_data logger, with PII fields redacted.
+
+Rows are fetched batch_size at a time from the cursor: with an
+unbuffered cursor (the default of mysql-connector), only one batch is
+ever held in memory, whatever the size of the table. Each row is
+redacted on its own, as RedactingFormatter does, so a value spanning
+several lines is redacted whole; a batch is written with a single
+write().
+
+Functions:
+    export_rows(cursor, query, stream, fields, batch_size) -> int
+        Writes the redacted rows of the query and returns their number.
+"""
+import logging
+from typing import List, TextIO
+
+from redaction import Redactor
+
+# Same output as RedactingFormatter, for the user_data logger
+LINE_FORMAT = "[HOLBERTON] user_data INFO %(asctime)-15s: %(message)s"
+
+
+def export_rows(cursor, query: str, stream: TextIO, fields: List[str],
+                batch_size: int = 1000) -> int:
+    """Writes the rows of a query as redacted log lines.
+
+    Args:
+        cursor: A DB-API cursor, unbuffered for flat memory.
+        query (str): The query to run.
+        stream (TextIO): Where to write the lines.
+        fields (list): The fields to redact.
+        batch_size (int): Rows fetched, redacted and written at a time.
+
+    Returns:
+        int: The number of rows written.
+    """
+    redactor = Redactor(fields, "***", ";")
+    formatter = logging.Formatter(LINE_FORMAT)
+    cursor.execute(query)
+    columns = [col[0] for col in cursor.description]
+    count = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return count
+        # One timestamp per batch instead of one per row
+        prefix = formatter.format(logging.LogRecord(
+            "user_data", logging.INFO, None, None, "", None, None))
+        stream.write("".join(
+            redactor.redact(prefix + "; ".join(
+                f"{col}={val}" for col, val in zip(columns, row)).strip())
+            + "\n" for row in rows))
+        count += len(rows)
@@ -4,6 +4,7 @@ Route module for the API
 """
 from os import getenv
 from api.v1.views import app_views
+from api.v1.auth.auth import compile_excluded_paths
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
 import os
@@ -13,6 +14,12 @@ app = Flask(__name__)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 
+# Paths that don't require authentication, compiled once
+EXCLUDED_PATHS = compile_excluded_paths(('/api/v1/status/',
+                                         '/api/v1/unauthorized/',
+                                         '/api/v1/forbidden/',
+                                         '/api/v1/auth_session/login/'))
+
 auth = None
 if getenv("AUTH_TYPE") == "auth":
     from api.v1.auth.auth import Auth
@@ -30,6 +37,12 @@ elif (getenv("AUTH_TYPE") == "session_exp_auth"):
 elif (getenv("AUTH_TYPE") == "session_db_auth"):
     from api.v1.auth.session_db_auth import SessionDBAuth
     auth = SessionDBAuth()
+elif (getenv("AUTH_TYPE") == "session_token_auth"):
+    from api.v1.auth.session_token_auth import SessionTokenAuth
+    auth = SessionTokenAuth()
+# The views read it from current_app: under "python3 -m api.v1.app",
+# importing api.v1.app from them would create another app and auth
+app.extensions["auth"] = auth
 
 
 @app.errorhandler(404)
@@ -61,18 +74,11 @@ def before_request():
     if auth is None:
         return
 
-    if auth:
-        request.current_user = auth.current_user(request)
-    else:
-        request.current_user = None
-    # Paths that don't require authentication
-    excluded_paths = ['/api/v1/status/',
-                      '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/',
-                      '/api/v1/auth_session/login/']
-
+    # Resolve the user once per request; the checks below and the views
+    # read it from request.current_user
+    request.current_user = auth.current_user(request)
     # Check if authentication is required for the current path
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
         return
 
     # Check if authorization header is present
@@ -81,13 +87,9 @@ def before_request():
         abort(401)
 
     # Check if a valid user is identified
-    if auth.current_user(request) is None:
+    if request.current_user is None:
         abort(403)
 
-    # Set the current user on the request if authenticated
-    request.current_user = auth.current_user(request)\
-        if auth else None
-
 
 if __name__ == "__main__":
     host = getenv("API_HOST", "0.0.0.0")
@@ -13,11 +13,72 @@ The Auth class is intended to be a base
 class for more specific authentication
 mechanisms.
 """
-from typing import List, TypeVar
+from functools import lru_cache
+from typing import List, Tuple, TypeVar
 from flask import request
 import os
 
 
+class ExcludedPaths:
+    """
+    Excluded paths compiled for Auth.require_auth.
+
+    Exact entries go in a set and wildcard entries ("/api/v1/stat*")
+    in a character trie of their prefixes, so matching a path costs
+    one set lookup plus one walk over the characters of the path,
+    whatever the number of entries.
+    """
+    def __init__(self, excluded_paths: Tuple[str, ...]):
+        """
+        Compiles a list of excluded paths.
+
+        Args:
+            excluded_paths (tuple): Paths, optionally ending with '*'.
+        """
+        self.exact = set()
+        # Nested dicts keyed by character; the key None marks the end
+        # of a wildcard prefix
+        self.prefixes = {}
+        for excluded_path in excluded_paths:
+            if excluded_path.endswith('*'):
+                node = self.prefixes
+                for char in excluded_path.rstrip('*').rstrip('/'):
+                    node = node.setdefault(char, {})
+                node[None] = True
+            else:
+                self.exact.add(excluded_path.rstrip('/'))
+
+    def match(self, path: str) -> bool:
+        """
+        Tells if a path is excluded from authentication.
+
+        Args:
+            path (str): Requested path.
+
+        Returns:
+            bool: True if an exact entry or a wildcard prefix matches.
+        """
+        normalized_path = path.rstrip('/')
+        if normalized_path in self.exact:
+            return True
+        node = self.prefixes
+        for char in normalized_path:
+            if None in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return None in node
+
+
+@lru_cache(maxsize=32)
+def compile_excluded_paths(excluded_paths: Tuple[str, ...]) -> ExcludedPaths:
+    """
+    Returns the ExcludedPaths of a tuple of paths, compiled once.
+    """
+    return ExcludedPaths(excluded_paths)
+
+
 class Auth:
     """
     A base class for API authentication.
@@ -36,28 +97,11 @@ class Auth:
         if path is None or excluded_paths is None:
             return True
 
-        # Normalize the path by removing any trailing slash
-        normalized_path = path.rstrip('/')
-
-        for excluded_path in excluded_paths:
-            # If excluded_path ends with '*', treat it as a prefix
-            if excluded_path.endswith('*'):
-                # Remove the trailing '*' and normalize the excluded path
-                normalized_excluded_path = excluded_path.\
-                        rstrip('*').rstrip('/')
-
-                # If the normalized path starts with
-                # the normalized excluded path, return False
-                if normalized_path.startswith(normalized_excluded_path):
-                    return False
-            else:
-                # Normalize the excluded path and compare it to the path
-                normalized_excluded_path = excluded_path.rstrip('/')
-                if normalized_path == normalized_excluded_path:
-                    return False
-
-        # If no match is found, the path requires authentication
-        return True
+        # Lists are compiled once per distinct content; callers on a hot
+        # path can pass the ExcludedPaths directly
+        if not isinstance(excluded_paths, ExcludedPaths):
+            excluded_paths = compile_excluded_paths(tuple(excluded_paths))
+        return not excluded_paths.match(path)
 
     def authorization_header(self, request=None) -> str:
         """
@@ -73,6 +117,12 @@ class Auth:
         """
         return None
 
+    def revoke_user_sessions(self, user_id: str = None) -> int:
+        """
+        Revokes every session of a user; returns how many were revoked
+        """
+        return 0
+
     def session_cookie(self, request=None):
         """
         Retrieves the session cookie from the request.
@@ -4,12 +4,38 @@ BasicAuth module
 """
 from api.v1.auth.auth import Auth
 import base64
+from collections import OrderedDict
+import hashlib
+import hmac
+import os
+import threading
+import time
 from typing import TypeVar
 from models.user import User
 
 
 class BasicAuth(Auth):
     """ BasicAuth class that inherits from Auth """
+    def __init__(self):
+        """
+        Initialize the cache of verified Authorization headers.
+
+        Entries map a keyed digest of the header (never the header
+        itself) to the user ID and the password hash that were verified.
+        They expire after BASIC_AUTH_CACHE_TTL seconds, at most
+        BASIC_AUTH_CACHE_SIZE are kept, and a hit only counts if the user
+        still exists with the same password hash.
+        """
+        try:
+            self.cache_ttl = int(os.getenv("BASIC_AUTH_CACHE_TTL", "60"))
+            self.cache_size = int(os.getenv("BASIC_AUTH_CACHE_SIZE", "1024"))
+        except ValueError:
+            self.cache_ttl = 60
+            self.cache_size = 1024
+        self._cache_key = os.urandom(32)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
     def extract_base64_authorization_header(
             self, authorization_header: str) -> str:
         """
@@ -137,6 +163,12 @@ class BasicAuth(Auth):
         if authorization_header is None:
             return None
 
+        # Headers verified recently skip the steps below
+        cache_key = self._cache_digest(authorization_header)
+        user = self._cached_user(cache_key)
+        if user is not None:
+            return user
+
         # Step 2: Extract the Base64 part of the Authorization header
         base64_authorization_header = self.\
             extract_base64_authorization_header(authorization_header)
@@ -156,4 +188,50 @@ class BasicAuth(Auth):
             return None
 
         # Step 5: Retrieve the User object based on the email and password
-        return self.user_object_from_credentials(user_email, user_pwd)
+        user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            self._cache_user(cache_key, user)
+        return user
+
+    def _cache_digest(self, authorization_header: str) -> bytes:
+        """
+        Keyed digest of an Authorization header, used as cache key.
+        """
+        return hmac.new(self._cache_key, authorization_header.encode(),
+                        hashlib.sha256).digest()
+
+    def _cached_user(self, cache_key: bytes) -> TypeVar('User'):
+        """
+        Returns the User verified for a cache key, or None if the entry
+        is missing, expired, or the user was removed or changed password.
+        """
+        with self._cache_lock:
+            entry = self._cache.get(cache_key)
+            if entry is None:
+                return None
+            user_id, password, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._cache[cache_key]
+                return None
+            self._cache.move_to_end(cache_key)
+
+        user = User.get(user_id)
+        if user is None or user.password != password:
+            with self._cache_lock:
+                self._cache.pop(cache_key, None)
+            return None
+        return user
+
+    def _cache_user(self, cache_key: bytes, user: TypeVar('User')):
+        """
+        Remembers that a cache key was verified for a user, evicting the
+        least recently used entries beyond the cache size.
+        """
+        if self.cache_ttl <= 0 or self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[cache_key] = (user.id, user.password,
+                                      time.monotonic() + self.cache_ttl)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
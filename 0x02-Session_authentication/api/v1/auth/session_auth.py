@@ -2,16 +2,24 @@
 """ Module of Session Authentication
 """
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import SessionStore
 import uuid
 from typing import Optional
 from models.user import User
 import os
 
 
+try:
+    SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "0"))
+except ValueError:
+    SESSION_MAX_ENTRIES = 0
+
+
 class SessionAuth(Auth):
     """Session-based Authentication mechanism"""
-    # Class attribute for storing user sessions
-    user_id_by_session_id = {}
+    # Class attribute for storing user sessions, at most
+    # SESSION_MAX_ENTRIES of them (no limit when 0)
+    user_id_by_session_id = SessionStore(max_entries=SESSION_MAX_ENTRIES)
 
     def create_session(self, user_id: str = None) -> str:
         """
@@ -96,3 +104,16 @@ class SessionAuth(Auth):
         # Delete the session ID from user_id_by_session_id
         del self.user_id_by_session_id[session_id]
         return True
+
+    def revoke_user_sessions(self, user_id: str = None) -> int:
+        """Deletes every session of a user.
+
+        Args:
+            user_id (str): The ID of the user whose sessions to delete.
+
+        Returns:
+            int: The number of sessions deleted.
+        """
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+        return self.user_id_by_session_id.remove_user(user_id)
@@ -3,36 +3,102 @@
 model and SessionDBAuth authentication class"""
 from api.v1.auth.session_exp_auth import SessionExpAuth
 from models.user_session import UserSession
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+import time
 from typing import Optional
+import uuid
 from flask import request
 
 
 class SessionDBAuth(SessionExpAuth):
     """Session-based authentication with database persistence."""
 
+    def __init__(self):
+        """Initialize SessionDBAuth with a cache of recent sessions.
+
+        The cache maps a session ID to the user ID, creation time and ID
+        of its UserSession, so repeated requests of the same session skip
+        the search on session_id: a hit is only checked against the
+        storage by ID, which sees the sessions removed meanwhile, by
+        another process included. At most SESSION_CACHE_SIZE sessions are
+        kept, the least recently used ones being dropped first.
+
+        When sessions expire, a daemon thread also removes the expired
+        UserSession every SESSION_PURGE_INTERVAL seconds (default 300,
+        0 to disable); purge_stats reports its sweeps. The UserSession
+        saved by earlier runs are loaded first, to be found and purged.
+        """
+        super().__init__()
+        UserSession.load_from_file()
+        try:
+            self.cache_size = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+        except ValueError:
+            self.cache_size = 1024
+        try:
+            self.purge_interval = int(
+                os.getenv("SESSION_PURGE_INTERVAL", "300"))
+        except ValueError:
+            self.purge_interval = 300
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.purge_stats = {"sweeps": 0, "purged": 0, "last_purged": 0,
+                            "last_sweep_seconds": 0.0}
+        if self.session_duration > 0 and self.purge_interval > 0:
+            threading.Thread(target=self._purge_loop, daemon=True).start()
+
     def create_session(self, user_id: Optional[str] = None) -> Optional[str]:
         """Create a new session and store it in UserSession."""
-        session_id = super().create_session(user_id)
-        if session_id is None:
+        if user_id is None or not isinstance(user_id, str):
             return None
+        session_id = str(uuid.uuid4())
 
-        # Store the session in UserSession model
+        # Store the session in UserSession model only: the in-memory
+        # store of SessionExpAuth is not used
         session = UserSession(user_id=user_id, session_id=session_id)
         session.save()
+        self._cache_session(session_id, user_id, session.created_at,
+                            session.id)
         return session_id
 
     def user_id_for_session_id(
             self, session_id: Optional[str] = None) -> Optional[str]:
-        """Retrieve the user ID associated with the given session_id."""
-        if session_id is None:
+        """Retrieve the user ID associated with the given session_id,
+        or None if the session is unknown or expired."""
+        if session_id is None or not isinstance(session_id, str):
             return None
 
-        # Retrieve session from UserSession model
-        session = UserSession.search({"session_id": session_id})
-        if not session:
-            return None
+        with self._cache_lock:
+            cached = self._cache.get(session_id)
+            if cached is not None:
+                self._cache.move_to_end(session_id)
+        if cached is not None:
+            # Removed by a logout, a purge or another worker since cached
+            session = UserSession.get(cached[2])
+            if session is None or session.session_id != session_id:
+                self._uncache_session(session_id)
+                return None
+        else:
+            # Index lookup on UserSession.session_id
+            session = UserSession.search({"session_id": session_id})
+            if not session:
+                return None
+            cached = (session[0].user_id, session[0].created_at,
+                      session[0].id)
+            self._cache_session(session_id, *cached)
 
-        return session[0].user_id if session else None
+        user_id, created_at, _ = cached
+        if self.session_duration <= 0:
+            return user_id
+        # created_at of the models is in UTC
+        expiration_time = created_at + timedelta(seconds=self.session_duration)
+        if datetime.utcnow() > expiration_time:
+            self._uncache_session(session_id)
+            return None
+        return user_id
 
     def destroy_session(self, request=None) -> bool:
         """Destroy a session by removing it from UserSession."""
@@ -44,6 +110,7 @@ class SessionDBAuth(SessionExpAuth):
         if session_id is None:
             return False
 
+        self._uncache_session(session_id)
         # Retrieve and delete the UserSession
         session = UserSession.search({"session_id": session_id})
         if not session:
@@ -51,3 +118,57 @@ class SessionDBAuth(SessionExpAuth):
 
         session[0].remove()  # Remove the session from the file database
         return True
+
+    def revoke_user_sessions(self, user_id: str = None) -> int:
+        """Remove every UserSession of a user, with a single write to
+        disk; return how many were removed."""
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+
+        # Index lookup on UserSession.user_id
+        sessions = UserSession.search({"user_id": user_id})
+        for session in sessions:
+            self._uncache_session(session.session_id)
+        return UserSession.remove_many(sessions)
+
+    def purge_expired_sessions(self) -> int:
+        """Remove the expired UserSession in one sweep and record it in
+        purge_stats; return how many were removed."""
+        start = time.perf_counter()
+        purged = UserSession.purge_expired(self.session_duration)
+        elapsed = time.perf_counter() - start
+        with self._cache_lock:
+            self.purge_stats = {
+                "sweeps": self.purge_stats["sweeps"] + 1,
+                "purged": self.purge_stats["purged"] + purged,
+                "last_purged": purged,
+                "last_sweep_seconds": elapsed}
+        return purged
+
+    def _purge_loop(self):
+        """Janitor thread: purge the expired sessions periodically."""
+        while True:
+            time.sleep(self.purge_interval)
+            try:
+                self.purge_expired_sessions()
+            except Exception:
+                logging.getLogger(__name__).exception(
+                    "Session purge failed, retried in %s s",
+                    self.purge_interval)
+
+    def _cache_session(self, session_id: str, user_id: str,
+                       created_at: datetime, model_id: str):
+        """Add a session to the cache, dropping the least recently used
+        ones beyond cache_size."""
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[session_id] = (user_id, created_at, model_id)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _uncache_session(self, session_id: str):
+        """Drop a session from the cache."""
+        with self._cache_lock:
+            self._cache.pop(session_id, None)
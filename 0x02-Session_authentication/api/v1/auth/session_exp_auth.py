@@ -3,6 +3,7 @@
 from datetime import datetime, timedelta
 import os
 from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_store import SessionStore
 
 
 class SessionExpAuth(SessionAuth):
@@ -14,6 +15,10 @@ class SessionExpAuth(SessionAuth):
             self.session_duration = int(os.getenv("SESSION_DURATION", "0"))
         except ValueError:
             self.session_duration = 0
+        # Own store, evicting the sessions once they expire
+        self.user_id_by_session_id = SessionStore(
+            ttl=max(self.session_duration, 0),
+            max_entries=SessionAuth.user_id_by_session_id.max_entries)
 
     def create_session(self, user_id: str = None) -> str:
         """Create a session ID with an expiration date
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+In-memory session store with expiry and a size cap.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Set
+
+
+class SessionStore(dict):
+    """
+    A dict of session ID => session data whose entries expire.
+
+    Every entry gets a deadline ttl seconds after it was set (never when
+    ttl is 0) in a min-heap, so expired sessions are evicted a few at a
+    time on each access, in O(log n) each. Above max_entries (no limit
+    when 0), the entries closest to expiry, or else the oldest ones, are
+    evicted. stats() reports the size and the eviction counters.
+
+    The store also indexes the session IDs by user ID, the data of a
+    session being its user ID or a dict with a "user_id" key, so the
+    sessions of a user are found and removed without a full scan.
+    """
+    # Expired entries evicted per access; the rest wait for the next ones
+    SWEEP_BATCH = 16
+
+    def __init__(self, ttl: int = 0, max_entries: int = 0):
+        """
+        Initializes an empty store.
+
+        Args:
+            ttl (int): Lifetime of an entry in seconds, 0 for no expiry.
+            max_entries (int): Maximum number of entries, 0 for no limit.
+        """
+        super().__init__()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions_by_user = {}
+        self.evicted_expired = 0
+        self.evicted_capacity = 0
+        # Heap of (deadline, sequence, session ID); an entry is stale when
+        # _deadlines no longer holds its (deadline, sequence)
+        self._heap = []
+        self._deadlines = {}
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+
+    def __setitem__(self, session_id: str, value):
+        """
+        Stores a session, giving it a fresh deadline.
+        """
+        with self._lock:
+            deadline = time.monotonic() + self.ttl if self.ttl > 0 \
+                else float("inf")
+            entry = (deadline, next(self._sequence))
+            if dict.__contains__(self, session_id):
+                self._unindex(session_id)
+            super().__setitem__(session_id, value)
+            self._sessions_by_user.setdefault(
+                self._user_id(value), set()).add(session_id)
+            self._deadlines[session_id] = entry
+            heapq.heappush(self._heap, entry + (session_id,))
+            self.sweep()
+            while self.max_entries > 0 and len(self) > self.max_entries:
+                # Stale heap entries pop without evicting anything
+                if self._evict_first():
+                    self.evicted_capacity += 1
+            if len(self._heap) > 2 * len(self) + 64:
+                self._rebuild_heap()
+
+    def __delitem__(self, session_id: str):
+        """
+        Deletes a session.
+        """
+        with self._lock:
+            self._unindex(session_id)
+            super().__delitem__(session_id)
+            del self._deadlines[session_id]
+
+    def pop(self, session_id: str, *default):
+        """
+        Deletes a session and returns its data.
+        """
+        with self._lock:
+            if dict.__contains__(self, session_id):
+                self._unindex(session_id)
+            self._deadlines.pop(session_id, None)
+            return super().pop(session_id, *default)
+
+    def clear(self):
+        """
+        Deletes every session.
+        """
+        with self._lock:
+            super().clear()
+            self._deadlines.clear()
+            self._sessions_by_user.clear()
+            self._heap = []
+
+    def get(self, session_id: str, default=None):
+        """
+        Returns the data of a session, or default if it is missing or
+        expired.
+        """
+        with self._lock:
+            self.sweep()
+            entry = self._deadlines.get(session_id)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self[session_id]
+                self.evicted_expired += 1
+                return default
+            return super().get(session_id, default)
+
+    def __getitem__(self, session_id: str):
+        """
+        Returns the data of a session; KeyError if missing or expired.
+        """
+        value = self.get(session_id, self._deadlines)
+        if value is self._deadlines:
+            raise KeyError(session_id)
+        return value
+
+    def __contains__(self, session_id) -> bool:
+        """
+        Tells if a session is stored and not expired.
+        """
+        return self.get(session_id, self._deadlines) is not self._deadlines
+
+    def sessions_of(self, user_id: str) -> Set[str]:
+        """
+        Returns the IDs of the sessions of a user.
+        """
+        with self._lock:
+            return set(self._sessions_by_user.get(user_id, ()))
+
+    def remove_user(self, user_id: str) -> int:
+        """
+        Deletes every session of a user.
+
+        Returns:
+            int: The number of sessions deleted.
+        """
+        with self._lock:
+            session_ids = list(self._sessions_by_user.get(user_id, ()))
+            for session_id in session_ids:
+                del self[session_id]
+            return len(session_ids)
+
+    def sweep(self, limit: int = SWEEP_BATCH) -> int:
+        """
+        Evicts up to limit expired sessions.
+
+        Returns:
+            int: The number of sessions evicted.
+        """
+        evicted = 0
+        now = time.monotonic()
+        with self._lock:
+            while self._heap and evicted < limit and \
+                    self._heap[0][0] <= now:
+                if self._evict_first():
+                    evicted += 1
+            self.evicted_expired += evicted
+        return evicted
+
+    def stats(self) -> dict:
+        """
+        Returns the size of the store and its eviction counters.
+        """
+        with self._lock:
+            return {"size": len(self),
+                    "evicted_expired": self.evicted_expired,
+                    "evicted_capacity": self.evicted_capacity}
+
+    def _user_id(self, value) -> str:
+        """
+        User ID of the data of a session.
+        """
+        if isinstance(value, dict):
+            return value.get("user_id")
+        return value
+
+    def _unindex(self, session_id: str):
+        """
+        Removes a stored session from the user ID index.
+        """
+        user_id = self._user_id(dict.__getitem__(self, session_id))
+        session_ids = self._sessions_by_user[user_id]
+        session_ids.discard(session_id)
+        if len(session_ids) == 0:
+            del self._sessions_by_user[user_id]
+
+    def _evict_first(self) -> bool:
+        """
+        Pops the first heap entry, deleting its session unless stale.
+        """
+        deadline, sequence, session_id = heapq.heappop(self._heap)
+        if self._deadlines.get(session_id) != (deadline, sequence):
+            return False
+        del self[session_id]
+        return True
+
+    def _rebuild_heap(self):
+        """
+        Drops the stale heap entries left by deletions and overwrites.
+        """
+        self._heap = [entry + (session_id,)
+                      for session_id, entry in self._deadlines.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Stateless session authentication with signed tokens
+"""
+from api.v1.auth.session_auth import SessionAuth
+from models.token_revocation import TokenRevocation
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+
+class SessionTokenAuth(SessionAuth):
+    """
+    Session authentication whose session ID is a signed token.
+
+    The token carries the user ID, its issue time, its expiry and a
+    random token ID, signed with HMAC-SHA256:
+
+        <key ID>.<base64url of "user_id|issued|expires|token ID">.<signature>
+
+    so it is verified without any session lookup, by every worker that
+    shares the keys, and across restarts. Only revocations are stored, as
+    TokenRevocation, which the workers share like the other models.
+    """
+
+    def __init__(self):
+        """
+        Initialize SessionTokenAuth with its keys and revocation lists.
+
+        SESSION_TOKEN_KEYS lists the keys as "kid:secret,kid:secret": the
+        first one signs new tokens, all of them verify tokens, so a key
+        is rotated by putting the new one first and dropping the old one
+        once its tokens have expired. Without it, a random key is drawn,
+        with a warning: tokens are then rejected by the other workers and
+        after a restart.
+
+        Tokens expire after SESSION_DURATION seconds (never when 0).
+        Logged out tokens and users whose sessions were revoked are
+        stored as TokenRevocation, removed once the tokens they cover
+        have expired (kept when tokens never expire).
+        """
+        try:
+            self.session_duration = int(os.getenv("SESSION_DURATION", "0"))
+        except ValueError:
+            self.session_duration = 0
+        self.keys = self._parse_keys(os.getenv("SESSION_TOKEN_KEYS", ""))
+        self.signing_key_id = next(iter(self.keys))
+        TokenRevocation.load_from_file()
+        self._purged_at = time.monotonic()
+
+    @staticmethod
+    def _parse_keys(keys: str) -> dict:
+        """
+        Parses SESSION_TOKEN_KEYS into an ordered dict kid => secret.
+        """
+        parsed = {}
+        for key in keys.split(","):
+            kid, _, secret = key.strip().partition(":")
+            if kid and secret and "." not in kid:
+                parsed[kid] = secret.encode()
+        if len(parsed) == 0:
+            logging.getLogger(__name__).warning(
+                "SESSION_TOKEN_KEYS is not set: tokens are signed with a "
+                "random key, valid in this process only until it exits")
+            parsed["0"] = os.urandom(32)
+        return parsed
+
+    def _sign(self, kid: str, payload: str) -> str:
+        """
+        Base64url HMAC-SHA256 of a payload with the key kid.
+        """
+        digest = hmac.new(self.keys[kid], "{}.{}".format(kid, payload)
+                          .encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+    def create_session(self, user_id: str = None) -> str:
+        """
+        Issues a signed token for a user.
+
+        Args:
+            user_id (str): The ID of the user for whom to create a session.
+
+        Returns:
+            str: The token, or None if user_id is invalid.
+        """
+        if user_id is None or not isinstance(user_id, str):
+            return None
+
+        issued = int(time.time())
+        expires = issued + self.session_duration \
+            if self.session_duration > 0 else 0
+        token_id = base64.urlsafe_b64encode(os.urandom(12)).decode()
+        payload = base64.urlsafe_b64encode("{}|{}|{}|{}".format(
+            user_id, issued, expires, token_id).encode()).decode()
+        return "{}.{}.{}".format(self.signing_key_id, payload,
+                                 self._sign(self.signing_key_id, payload))
+
+    def _verify(self, token: str) -> Optional[Tuple[str, int, str]]:
+        """
+        Checks the signature and the expiry of a token.
+
+        Returns:
+            tuple: (user ID, issue time, token ID), or None if the token
+            is invalid, expired or revoked.
+        """
+        if token is None or not isinstance(token, str):
+            return None
+        try:
+            kid, payload, signature = token.split(".")
+            # As bytes: compare_digest refuses non-ASCII str
+            if kid not in self.keys or not hmac.compare_digest(
+                    signature.encode(), self._sign(kid, payload).encode()):
+                return None
+            user_id, issued, expires, token_id = base64.urlsafe_b64decode(
+                payload).decode().rsplit("|", 3)
+            issued = int(issued)
+            expires = int(expires)
+        except ValueError:
+            # Not a token: wrong layout, base64, encoding or numbers
+            return None
+
+        if expires and time.time() > expires:
+            return None
+        # Index lookups, mostly answered by the Bloom filters
+        if TokenRevocation.search({"token_id": token_id}):
+            return None
+        for revocation in TokenRevocation.search({"user_id": user_id}):
+            if issued <= revocation.revoked_before:
+                return None
+        return user_id, issued, token_id
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """
+        Retrieves the User ID carried by a valid token.
+
+        Args:
+            session_id (str): The token.
+
+        Returns:
+            str: The User ID, or None if the token is not valid.
+        """
+        verified = self._verify(session_id)
+        if verified is None:
+            return None
+        return verified[0]
+
+    def destroy_session(self, request=None) -> bool:
+        """
+        Revokes the token of the session cookie of the request.
+        """
+        verified = self._verify(self.session_cookie(request))
+        if verified is None:
+            return False
+        TokenRevocation(token_id=verified[2]).save()
+        self._purge_revocations()
+        return True
+
+    def revoke_user_sessions(self, user_id: str = None) -> int:
+        """
+        Revokes every token of a user issued until now.
+
+        Tokens are not stored, so the number of revoked tokens is
+        unknown: returns 1 once the user is revoked, 0 otherwise.
+        """
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+        revocations = TokenRevocation.search({"user_id": user_id})
+        revocation = revocations[0] if revocations \
+            else TokenRevocation(user_id=user_id)
+        revocation.revoked_before = int(time.time())
+        revocation.save()
+        self._purge_revocations()
+        return 1
+
+    def _purge_revocations(self):
+        """
+        Removes the revocations of expired tokens, at most once per
+        SESSION_DURATION.
+        """
+        if self.session_duration <= 0 or \
+                time.monotonic() - self._purged_at < self.session_duration:
+            return
+        self._purged_at = time.monotonic()
+        TokenRevocation.purge_expired(self.session_duration)
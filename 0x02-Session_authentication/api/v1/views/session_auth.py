@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """handle login via session-based authentication"""
-from flask import jsonify, request, abort, make_response
+from flask import current_app, jsonify, request, abort, make_response
 from api.v1.views import app_views
 from models.user import User
 import os
@@ -33,8 +33,8 @@ def session_auth_login():
     if not user.is_valid_password(password):
         return jsonify({"error": "wrong password"}), 401
 
-    # Import auth and create a session ID
-    from api.v1.app import auth
+    # Create a session ID with the auth of the app
+    auth = current_app.extensions["auth"]
     session_id = auth.create_session(user.id)
 
     # Create a JSON response for the user
@@ -55,7 +55,7 @@ def session_auth_logout():
     """ DELETE /api/v1/auth_session/logout
     Handles user logout by deleting the session.
     """
-    from api.v1.app import auth
+    auth = current_app.extensions["auth"]
 
     # Attempt to destroy the session
     if not auth.destroy_session(request):
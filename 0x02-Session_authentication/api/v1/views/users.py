@@ -2,18 +2,65 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import (abort, current_app, jsonify, request, Response,
+                   stream_with_context)
 from models.user import User
+import base64
+import json
+
+MAX_PAGE_SIZE = 1000
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (optional):
+      - limit: page size (at most MAX_PAGE_SIZE)
+      - cursor: next_cursor of the previous page, an opaque token of the
+        last ID it returned: pages come in ID order and resume after
+        that ID, whatever users were created or deleted meanwhile
+      - stream: 1 to send the whole list incrementally
     Return:
       - list of all User objects JSON represented
+      - with limit: {"users": [...], "next_cursor": ...}, next_cursor
+        being null on the last page
+      - 400 if limit isn't a valid number or cursor a valid token
+    """
+    if request.args.get("stream") == "1":
+        return Response(stream_with_context(_stream_users()),
+                        mimetype="application/json")
+
+    if request.args.get("limit") is None:
+        all_users = [user.to_json() for user in User.all()]
+        return jsonify(all_users)
+
+    try:
+        limit = min(int(request.args.get("limit")), MAX_PAGE_SIZE)
+        after = base64.urlsafe_b64decode(
+            request.args.get("cursor", "")).decode()
+    except ValueError:
+        limit = -1
+    if limit <= 0:
+        return jsonify({'error': "Wrong pagination"}), 400
+
+    users = User.page(after, limit)
+    next_cursor = None
+    if len(users) == limit:
+        next_cursor = base64.urlsafe_b64encode(
+            users[-1].id.encode()).decode()
+    return jsonify({"users": [user.to_json() for user in users],
+                    "next_cursor": next_cursor})
+
+
+def _stream_users():
+    """ JSON list of all User objects, one object at a time
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    yield "["
+    separator = ""
+    for user in User.iter_all():
+        yield separator + json.dumps(user.to_json())
+        separator = ","
+    yield "]"
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -56,6 +103,10 @@ def delete_user(user_id: str = None) -> str:
     if user is None:
         abort(404)
     user.remove()
+    # The sessions of a deleted user must not authenticate anymore
+    auth = current_app.extensions.get("auth")
+    if auth is not None:
+        auth.revoke_user_sessions(user_id)
     return jsonify({}), 200
 
 
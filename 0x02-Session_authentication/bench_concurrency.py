@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+""" Multi-threaded stress of the model store
+
+Each thread creates, updates, searches and removes its own users while
+sharing the store with the others. After every run the in-memory objects,
+the indexes and the files on disk must agree.
+
+Usage: ./bench_concurrency.py [operations per thread]    (default: 2000)
+Set STORAGE_MODE / STORAGE_FLUSH_INTERVAL to stress the other modes.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import models.base as base
+from models.user import User
+
+
+def worker(thread_id: int, operations: int, kept: list, errors: list):
+    """ Mix of save/search/get/remove on users owned by this thread
+    """
+    try:
+        mine = []
+        for i in range(operations):
+            step = i % 8
+            if step in (0, 4) or len(mine) == 0:
+                user = User()
+                user.email = "t{}-{}@hbtn.io".format(thread_id, i)
+                user.save()
+                mine.append(user)
+            elif step in (1, 5):
+                user = mine[-1]
+                found = User.search({"email": user.email})
+                assert found == [user], "search missed {}".format(user.id)
+                assert User.get(user.id) is user
+            elif step in (2, 6):
+                user = mine[0]
+                user.email = "t{}-{}-renamed@hbtn.io".format(thread_id, i)
+                user.save()
+            elif step == 3:
+                mine.pop(0).remove()
+            User.count()
+        kept.append(len(mine))
+    except Exception as e:
+        errors.append(e)
+
+
+def check(expected: int):
+    """ Memory, indexes and files on disk must describe the same users
+    """
+    users = User.all()
+    assert len(users) == expected, (len(users), expected)
+    for user in users:
+        assert User.search({"email": user.email}) == [user]
+    indexed = sum(len(ids) for ids in base.INDEXES["User"]["email"].values())
+    assert indexed == expected, (indexed, expected)
+
+    base.flush()
+    in_memory = {user.id: user.email for user in users}
+    User.load_from_file()
+    on_disk = {user.id: user.email for user in User.all()}
+    assert on_disk == in_memory
+
+
+operations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+for threads in (1, 2, 4, 8):
+    # Journal compaction works on paths relative to the current directory
+    while base.COMPACTING:
+        time.sleep(0.01)
+    os.chdir(tempfile.mkdtemp())
+    User.load_from_file()
+    kept = []
+    errors = []
+    pool = [threading.Thread(target=worker,
+                             args=(i, operations, kept, errors))
+            for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    check(sum(kept))
+    print("{} threads: {:8.0f} ops/s".format(
+        threads, threads * operations / elapsed))
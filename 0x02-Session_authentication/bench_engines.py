@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" get / search / save latency of the file and SQLite storage engines
+
+Usage: ./bench_engines.py [count]    (default: 100000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import models.base as base
+from models.sqlite_engine import SQLiteEngine
+from models.user import User
+
+
+def timed(label: str, func, repeat: int):
+    """ Print the average time of func() in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print("  {:<26} {:12.1f} us".format(label, elapsed * 1e6))
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+os.chdir(tempfile.mkdtemp())
+users = []
+for i in range(count):
+    user = User(email="user{}@hbtn.io".format(i),
+                first_name="First{}".format(i))
+    user.password = "pwd{}".format(i)
+    users.append(user)
+
+for engine in ("file", "sqlite"):
+    if engine == "sqlite":
+        base.ENGINE = SQLiteEngine("bench.sqlite3")
+        base.ENGINE.insert_many(User, [user.to_json(True) for user in users])
+    else:
+        base.ENGINE = None
+        User.load_from_file()
+        for user in users:
+            base.DATA["User"][user.id] = user
+            User._index_add(user)
+        User.save_to_file()
+    print("{} engine, {} users".format(engine, User.count()))
+
+    timed("get(id)", lambda: User.get(random.choice(users).id), 1000)
+    timed("search(email) - indexed",
+          lambda: User.search({"email": random.choice(users).email}), 1000)
+    timed("search(first_name) - scan",
+          lambda: User.search({"first_name": "First0"}), 5)
+    saves = 10 if engine == "file" else 1000
+    timed("save()", lambda: random.choice(users).save(), saves)
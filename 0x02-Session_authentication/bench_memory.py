@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+""" Bytes per User and UserSession object, with and without __slots__
+
+Usage: ./bench_memory.py [count]    (default: 100000)
+"""
+from datetime import datetime, timedelta
+import sys
+import tracemalloc
+import uuid
+
+from models.base import TIMESTAMP_FORMAT
+from models.user import User
+from models.user_session import UserSession
+
+
+class DictUser():
+    """ User attribute layout with a per-instance __dict__
+    """
+
+    def __init__(self, **kwargs):
+        self.id = kwargs.get('id')
+        self.created_at = datetime.strptime(kwargs.get('created_at'),
+                                            TIMESTAMP_FORMAT)
+        self.updated_at = datetime.strptime(kwargs.get('updated_at'),
+                                            TIMESTAMP_FORMAT)
+        self.email = kwargs.get('email')
+        self._password = kwargs.get('_password')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+
+class DictUserSession():
+    """ UserSession attribute layout with a per-instance __dict__
+    """
+
+    def __init__(self, **kwargs):
+        self.id = kwargs.get('id')
+        self.created_at = datetime.strptime(kwargs.get('created_at'),
+                                            TIMESTAMP_FORMAT)
+        self.updated_at = datetime.strptime(kwargs.get('updated_at'),
+                                            TIMESTAMP_FORMAT)
+        self.user_id = kwargs.get('user_id')
+        self.session_id = kwargs.get('session_id')
+
+
+def bytes_per_object(cls, rows: list) -> float:
+    """ Average memory allocated by building one object per row
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objs = [cls(**row) for row in rows]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    # The list holding the objects is not part of their cost
+    return (used - sys.getsizeof(objs)) / len(objs)
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+start = datetime.utcnow()
+# One object per second, as written by save() with updated_at == created_at
+stamps = [(start + timedelta(seconds=i)).strftime(TIMESTAMP_FORMAT)
+          for i in range(count)]
+users = [{'id': str(uuid.uuid4()), 'created_at': stamps[i],
+          'updated_at': stamps[i], 'email': "user{}@hbtn.io".format(i),
+          '_password': "0" * 64, 'first_name': "First", 'last_name': "Last"}
+         for i in range(count)]
+sessions = [{'id': str(uuid.uuid4()), 'created_at': stamps[i],
+             'updated_at': stamps[i], 'user_id': users[i]['id'],
+             'session_id': str(uuid.uuid4())}
+            for i in range(count)]
+
+for name, before, after, rows in (("User", DictUser, User, users),
+                                  ("UserSession", DictUserSession,
+                                   UserSession, sessions)):
+    before_size = bytes_per_object(before, rows)
+    after_size = bytes_per_object(after, rows)
+    print("{:<12} __dict__ {:6.0f} B/object  __slots__ {:6.0f} B/object"
+          .format(name, before_size, after_size))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+""" Auth.require_auth against the former linear scan, across list sizes
+
+Usage: ./bench_require_auth.py [lookups]    (default: 20000)
+"""
+import sys
+import time
+
+from api.v1.auth.auth import Auth, compile_excluded_paths
+
+
+def linear_require_auth(path: str, excluded_paths: list) -> bool:
+    """ Former Auth.require_auth: normalizes and compares every entry
+    """
+    normalized_path = path.rstrip('/')
+    for excluded_path in excluded_paths:
+        if excluded_path.endswith('*'):
+            prefix = excluded_path.rstrip('*').rstrip('/')
+            if normalized_path.startswith(prefix):
+                return False
+        elif normalized_path == excluded_path.rstrip('/'):
+            return False
+    return True
+
+
+lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+auth = Auth()
+for size in (5, 50, 500, 5000):
+    excluded_paths = []
+    for i in range(size):
+        if i % 4 == 0:
+            excluded_paths.append("/api/v1/public{}/*".format(i))
+        else:
+            excluded_paths.append("/api/v1/route{}/".format(i))
+    # Hits on the last entries and misses: the worst cases of a scan
+    paths = ["/api/v1/route{}".format(size - 1),
+             "/api/v1/public{}/page".format((size - 1) // 4 * 4),
+             "/api/v1/users/me", "/api/v1/route"]
+
+    for path in paths:
+        assert auth.require_auth(path, excluded_paths) == \
+            linear_require_auth(path, excluded_paths), path
+
+    compiled = compile_excluded_paths(tuple(excluded_paths))
+    timings = []
+    for func, arg in ((linear_require_auth, excluded_paths),
+                      (auth.require_auth, excluded_paths),
+                      (auth.require_auth, compiled)):
+        start = time.perf_counter()
+        for i in range(lookups):
+            func(paths[i % len(paths)], arg)
+        timings.append((time.perf_counter() - start) / lookups * 1e6)
+    print("{:>5} excluded paths  linear {:8.2f} us  list {:6.2f} us  "
+          "precompiled {:5.2f} us".format(size, *timings))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+""" Session resolution of SessionTokenAuth against SessionDBAuth
+
+Both resolve random sessions among many active ones, so most lookups of
+SessionDBAuth miss its LRU and go to the UserSession store, while
+SessionTokenAuth only verifies a signature.
+
+Usage: ./bench_session_tokens.py [sessions] [lookups]    (default: 50000 20000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from api.v1.auth.session_db_auth import SessionDBAuth
+from api.v1.auth.session_token_auth import SessionTokenAuth
+from models.user_session import UserSession
+import models.base as base
+
+
+os.environ["SESSION_DURATION"] = "3600"
+os.environ["SESSION_PURGE_INTERVAL"] = "0"
+sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+os.chdir(tempfile.mkdtemp())
+UserSession.load_from_file()
+
+for auth in (SessionDBAuth(), SessionTokenAuth()):
+    start = time.perf_counter()
+    if isinstance(auth, SessionDBAuth):
+        # Bulk load: one save() per session rewrites the whole file
+        session_ids = []
+        for i in range(sessions):
+            session = UserSession(user_id="user{}".format(i),
+                                  session_id="session{}".format(i))
+            base.DATA["UserSession"][session.id] = session
+            UserSession._index_add(session)
+            session_ids.append(session.session_id)
+        UserSession.save_to_file()
+    else:
+        session_ids = [auth.create_session("user{}".format(i))
+                       for i in range(sessions)]
+    created = (time.perf_counter() - start) / sessions
+
+    picks = [random.choice(session_ids) for _ in range(lookups)]
+    start = time.perf_counter()
+    for session_id in picks:
+        assert auth.user_id_for_session_id(session_id) is not None
+    per_lookup = (time.perf_counter() - start) / lookups
+    print("{:<17} {} sessions  create {:7.1f} us  lookup {:7.1f} us"
+          .format(type(auth).__name__, sessions, created * 1e6,
+                  per_lookup * 1e6))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+""" Startup time of the JSON and binary snapshot formats
+
+Usage: ./bench_snapshot.py [count ...]    (default: 100000 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import models.base as base
+from models.user import User
+
+
+counts = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+
+for count in counts:
+    os.chdir(tempfile.mkdtemp())
+    User.load_from_file()
+    for i in range(count):
+        user = User(email="user{}@hbtn.io".format(i),
+                    first_name="First{}".format(i), last_name="Last")
+        user.password = "pwd{}".format(i)
+        base.DATA["User"][user.id] = user
+
+    for storage_format in ("json", "binary"):
+        base.STORAGE_FORMAT = storage_format
+        start = time.perf_counter()
+        User.save_to_file()
+        save_time = time.perf_counter() - start
+        size = os.path.getsize(User._snapshot_path())
+
+        start = time.perf_counter()
+        User.load_from_file()
+        load_time = time.perf_counter() - start
+        assert User.count() == count
+
+        print("{:>8} users  {:<6}  save {:7.2f}s  load {:7.2f}s  {:6.1f} MB"
+              .format(count, storage_format, save_time, load_time,
+                      size / 1e6))
@@ -1,39 +1,141 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+from typing import TypeVar, List, Iterable, Iterator
+from os import getenv, path
+from models import snapshot
+from models.bloom import ScalableBloomFilter
+from models.rwlock import ReadWriteLock
+from models.sqlite_engine import SQLiteEngine
+import atexit
 import json
+import logging
+import os
+import threading
 import uuid
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+# "file" keeps objects in DATA backed by .db_<Class> files (everything
+# below), "sqlite" hands them to models.sqlite_engine
+STORAGE_ENGINE = getenv("STORAGE_ENGINE", "file")
+ENGINE = None
+if STORAGE_ENGINE == "sqlite":
+    ENGINE = SQLiteEngine(getenv("STORAGE_SQLITE_PATH", ".db.sqlite3"))
+# "json" rewrites the snapshot file on every mutation, "journal" appends
+# the mutation to .db_<Class>.journal and folds it into the snapshot from
+# time to time
+STORAGE_MODE = getenv("STORAGE_MODE", "json")
+# Several processes sharing the files: STORAGE_SHARED=1 journals every
+# mutation under a .db_<Class>.lock file lock, and each process applies the
+# journal lines appended by the others before reading. Compactions bump the
+# counter in .db_<Class>.gen and keep the folded journal as
+# .db_<Class>.journal.<former generation>, where the other processes read
+# the lines they missed; processes further behind reload
+STORAGE_SHARED = getenv("STORAGE_SHARED", "0") == "1"
+if STORAGE_SHARED:
+    STORAGE_MODE = "journal"
+try:
+    JOURNAL_COMPACT_SIZE = int(getenv("STORAGE_JOURNAL_COMPACT_SIZE",
+                                      str(4 * 1024 * 1024)))
+except ValueError:
+    JOURNAL_COMPACT_SIZE = 4 * 1024 * 1024
+# Snapshot encoding: "json" (.db_<Class>.json) or "binary" (.db_<Class>.bin,
+# see models.snapshot)
+STORAGE_FORMAT = getenv("STORAGE_FORMAT", "json")
+JOURNAL_LOCK = threading.Lock()
+COMPACT_LOCK = threading.Lock()
+COMPACTING = set()
+# Per class in shared mode: (generation, journal inode, journal offset)
+# already applied to DATA
+SYNC = {}
+# Write-behind for the "json" mode: when STORAGE_FLUSH_INTERVAL (seconds)
+# is set, mutations only mark their class dirty and a background thread
+# saves dirty classes every interval or after STORAGE_FLUSH_CHANGES changes
+try:
+    FLUSH_INTERVAL = float(getenv("STORAGE_FLUSH_INTERVAL", "0"))
+    FLUSH_CHANGES = int(getenv("STORAGE_FLUSH_CHANGES", "1000"))
+except ValueError:
+    FLUSH_INTERVAL = 0
+    FLUSH_CHANGES = 1000
+FLUSH_LOCK = threading.Lock()
+FLUSH_WRITE_LOCK = threading.Lock()
+FLUSH_EVENT = threading.Event()
+FLUSHER = None
+DIRTY = {}
+# One ReadWriteLock per class guards DATA, INDEXES and the journal order;
+# SNAPSHOT_LOCK orders snapshot writes so the newest one lands last.
+# Lock order: FLUSH_WRITE_LOCK, SNAPSHOT_LOCK or COMPACT_LOCK, class lock,
+# file lock, JOURNAL_LOCK
+LOCKS = {}
+SNAPSHOT_LOCK = threading.Lock()
 DATA = {}
+# Per class: {attribute: {value: {object ID: None}}} and the indexed values
+# of each object ID, so a re-saved object can be moved to its new bucket
+INDEXES = {}
+INDEXED_VALUES = {}
+# Per class: [object IDs in sorted order, IDs added since, IDs removed
+# since], for page() to seek past a cursor. None until page() needs it;
+# the indexes record the changes in O(1) and page() merges them into the
+# list, in a single linear pass, under the write lock
+SORTED_IDS = {}
+# Per class: {attribute: Bloom filter of its indexed values}, checked by
+# search() before taking the class lock. Only ever a superset of the values
+# stored: _load() drops them and _bloom_compact() starts a thread that
+# builds new filters from a copy of the indexes, outside the class lock,
+# then swaps them in.
+# STORAGE_BLOOM_FP_RATE sets the false positive rate (0 disables them)
+try:
+    BLOOM_FP_RATE = float(getenv("STORAGE_BLOOM_FP_RATE", "0.01"))
+except ValueError:
+    BLOOM_FP_RATE = 0.01
+BLOOMS = {}
+# Per class while its filters are rebuilt: the indexed values of the
+# objects saved meanwhile, added to the new filters before the swap
+BLOOM_PENDING = {}
 
 
 class Base():
     """ Base class
     """
+    # Attributes kept in a hash index (value => object IDs) for search(),
+    # refreshed from the object on each save()
+    _indexed_attributes = ()
+    # Subclasses declare their attributes in __slots__ too, so instances
+    # carry no per-object __dict__
+    __slots__ = ('id', 'created_at', 'updated_at')
+    _slot_names = __slots__
+
+    def __init_subclass__(cls, **kwargs):
+        """ Collect the slot names of the class and of its parents
+        """
+        super().__init_subclass__(**kwargs)
+        cls._slot_names = tuple(
+            name for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get('__slots__', ()))
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
         if DATA.get(s_class) is None:
-            DATA[s_class] = {}
+            DATA.setdefault(s_class, {})
+            INDEXES.setdefault(s_class, {})
+            INDEXED_VALUES.setdefault(s_class, {})
+            BLOOMS.setdefault(s_class, {})
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
-        if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
-        else:
-            self.created_at = datetime.utcnow()
-        if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
-        else:
-            self.updated_at = datetime.utcnow()
+        self.created_at = _timestamp(kwargs.get('created_at'))
+        self.updated_at = _timestamp(kwargs.get('updated_at'))
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
@@ -48,7 +150,7 @@ class Base():
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        for key, value in self._attributes():
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -57,56 +159,529 @@ class Base():
                 result[key] = value
         return result
 
+    def _attributes(self) -> Iterable[tuple]:
+        """ Return the (name, value) pairs of the instance attributes
+        """
+        for key in self._slot_names:
+            try:
+                yield key, getattr(self, key)
+            except AttributeError:
+                continue
+        # Subclasses without __slots__ still get a __dict__
+        yield from getattr(self, '__dict__', {}).items()
+
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from file, after saving the pending
+        write-behind changes of the class
         """
+        if ENGINE is not None:
+            return
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
+        with FLUSH_WRITE_LOCK, SNAPSHOT_LOCK, cls._lock().write(), \
+                cls._file_lock(shared=True):
+            with FLUSH_LOCK:
+                pending = DIRTY.pop(s_class, None)
+            if pending is not None:
+                try:
+                    cls._write_snapshot(list(DATA[s_class].items()))
+                except Exception:
+                    # Not reloaded: that would drop the changes
+                    _redirty(*pending)
+                    raise
+            cls._load()
+
+    @classmethod
+    def _load(cls):
+        """ Replace the objects of the class by the ones on disk
+        """
+        s_class = cls.__name__
+        file_path = cls._snapshot_path()
         DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        INDEXES[s_class] = {}
+        INDEXED_VALUES[s_class] = {}
+        SORTED_IDS[s_class] = None
+        # No filter until rebuilt after the load: search() goes through the
+        # indexes meanwhile, and a rebuild of the former objects is dropped
+        BLOOMS[s_class] = {}
+        BLOOM_PENDING.pop(s_class, None)
+        generation = cls._generation()
+        if path.exists(file_path) and STORAGE_FORMAT == "binary":
+            with open(file_path, 'rb') as f:
+                for obj_attrs in snapshot.load(f):
+                    obj = cls(**obj_attrs)
+                    DATA[s_class][obj.id] = obj
+                    cls._index_add(obj)
+        elif path.exists(file_path):
+            with open(file_path, 'r') as f:
+                objs_json = json.load(f)
+                for obj_id, obj_json in objs_json.items():
+                    obj = cls(**obj_json)
+                    DATA[s_class][obj_id] = obj
+                    cls._index_add(obj)
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        if STORAGE_MODE == "journal":
+            journal_path = ".db_{}.journal".format(s_class)
+            cls._journal_replay(journal_path + ".old")
+            position = cls._journal_replay(journal_path)
+            if position[0] is not None and \
+                    path.getsize(journal_path) > position[1]:
+                # Tail torn by a crash mid-append: the next append would
+                # be glued to it and lost with it
+                os.truncate(journal_path, position[1])
+            SYNC[s_class] = (generation,) + position
+        cls._bloom_compact(force=True)
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
         """
+        if ENGINE is not None:
+            return
+        if STORAGE_MODE == "journal":
+            cls.compact()
+            return
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        with SNAPSHOT_LOCK:
+            with cls._lock().read():
+                objs = list(DATA[s_class].items())
+            cls._write_snapshot(objs)
+
+    @classmethod
+    def _lock(cls) -> ReadWriteLock:
+        """ Reader/writer lock of the objects of the class
+        """
+        lock = LOCKS.get(cls.__name__)
+        if lock is None:
+            lock = LOCKS.setdefault(cls.__name__, ReadWriteLock())
+        return lock
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    @contextmanager
+    def _file_lock(cls, shared: bool = False):
+        """ Hold the lock file of the class in shared mode, so processes
+        do not interleave writes nor read a half-done compaction
+        """
+        if not STORAGE_SHARED or fcntl is None:
+            yield
+            return
+        with open(".db_{}.lock".format(cls.__name__), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @classmethod
+    def _generation(cls) -> int:
+        """ Number of compactions of the journal in shared mode
+        """
+        try:
+            with open(".db_{}.gen".format(cls.__name__), 'r') as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    @classmethod
+    def _sync(cls):
+        """ Apply the mutations other processes journaled since the last
+        sync; a stat() and a read of the generation when nothing changed
+        """
+        if not STORAGE_SHARED:
+            return
+        s_class = cls.__name__
+        try:
+            stat = os.stat(".db_{}.journal".format(s_class))
+            position = (stat.st_ino, stat.st_size)
+        except OSError:
+            position = (None, 0)
+        # Read after the stat: a compaction in between shows up as a new
+        # generation, not as an unchanged journal
+        if SYNC.get(s_class) == (cls._generation(),) + position:
+            return
+        with cls._lock().write(), cls._file_lock(shared=True):
+            cls._sync_locked()
+
+    @classmethod
+    def _sync_locked(cls):
+        """ _sync() for callers holding the class lock and the file lock
+        """
+        if not STORAGE_SHARED:
+            return
+        s_class = cls.__name__
+        if s_class not in SYNC:
+            cls._load()
+            return
+        generation, inode, offset = SYNC[s_class]
+        journal_path = ".db_{}.journal".format(s_class)
+        current = cls._generation()
+        if current != generation:
+            # Compacted since: the rest of our journal is in its archive,
+            # unless more than one compaction ran
+            archive_path = "{}.{}".format(journal_path, generation)
+            try:
+                archived_inode = os.stat(archive_path).st_ino
+            except OSError:
+                archived_inode = None
+            if current != generation + 1 or archived_inode is None or \
+                    inode not in (None, archived_inode):
+                cls._load()
+                return
+            cls._journal_replay(archive_path, offset if inode else 0)
+            generation, offset = current, 0
+        SYNC[s_class] = (generation,) + cls._journal_replay(journal_path,
+                                                            offset)
+
+    @classmethod
+    def _write_snapshot(cls, objs: list):
+        """ Write (ID, object) pairs to the snapshot file of the class,
+        replacing it atomically
+        """
+        file_path = cls._snapshot_path()
+        tmp_path = "{}.{}.tmp".format(file_path, threading.get_ident())
+        if STORAGE_FORMAT == "binary":
+            with open(tmp_path, 'wb') as f:
+                snapshot.dump((dict(obj._attributes()) for _, obj in objs), f)
+        else:
+            objs_json = {}
+            for obj_id, obj in objs:
+                objs_json[obj_id] = obj.to_json(True)
+            with open(tmp_path, 'w') as f:
+                json.dump(objs_json, f)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def _snapshot_path(cls) -> str:
+        """ Path of the snapshot file of the class for STORAGE_FORMAT
+        """
+        extension = "bin" if STORAGE_FORMAT == "binary" else "json"
+        return ".db_{}.{}".format(cls.__name__, extension)
+
+    @classmethod
+    def _journal_append(cls, op: str, *objs: TypeVar('Base')):
+        """ Append one mutation ("save" or "remove") per object to the
+        journal and schedule a compaction once it grows past the threshold
+        """
+        s_class = cls.__name__
+        lines = []
+        for obj in objs:
+            record = {"op": op, "id": obj.id}
+            if op == "save":
+                record["obj"] = obj.to_json(True)
+            lines.append(json.dumps(record) + "\n")
+
+        with JOURNAL_LOCK:
+            with open(".db_{}.journal".format(s_class), 'a') as f:
+                f.write("".join(lines))
+                size = f.tell()
+                if STORAGE_SHARED:
+                    # Caught up by _sync_locked() before the mutation
+                    SYNC[s_class] = (SYNC[s_class][0],
+                                     os.fstat(f.fileno()).st_ino, size)
+            if size < JOURNAL_COMPACT_SIZE or s_class in COMPACTING:
+                return
+            COMPACTING.add(s_class)
+        threading.Thread(target=cls.compact, daemon=True).start()
+
+    @classmethod
+    def _journal_replay(cls, journal_path: str, offset: int = 0) -> tuple:
+        """ Apply the mutations of a journal file, from a byte offset,
+        to the loaded objects and return the (inode, offset) reached
+        """
+        if not path.exists(journal_path):
+            return (None, 0)
+        s_class = cls.__name__
+        with open(journal_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn or in-progress write at the tail of the journal
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                obj_id = record.get("id")
+                cls._index_remove(obj_id)
+                if record.get("op") == "save":
+                    DATA[s_class][obj_id] = cls(**record.get("obj"))
+                    cls._index_add(DATA[s_class][obj_id])
+                else:
+                    DATA[s_class].pop(obj_id, None)
+            return (os.fstat(f.fileno()).st_ino, offset)
+
+    @classmethod
+    def compact(cls):
+        """ Fold the journal into a new snapshot file
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.journal".format(s_class)
+        old_path = journal_path + ".old"
+        try:
+            with COMPACT_LOCK, ExitStack() as file_lock:
+                with cls._lock().write():
+                    # Other processes wait until the snapshot is complete
+                    file_lock.enter_context(cls._file_lock())
+                    cls._sync_locked()
+                    with JOURNAL_LOCK:
+                        # Later mutations go to a fresh journal; replaying
+                        # them on top of the snapshot is idempotent, so the
+                        # snapshot may already include some of them
+                        # The journal of this generation alone, as the
+                        # other processes know their offset in it
+                        archivable = not path.exists(old_path)
+                        if path.exists(old_path) and \
+                                path.exists(journal_path):
+                            with open(journal_path, 'r') as src, \
+                                    open(old_path, 'a') as dst:
+                                dst.write(src.read())
+                            os.remove(journal_path)
+                        elif path.exists(journal_path):
+                            os.replace(journal_path, old_path)
+                        elif archivable:
+                            # Nothing journaled in this generation
+                            open(old_path, 'w').close()
+                    if STORAGE_SHARED:
+                        generation = SYNC[s_class][0] + 1
+                        with open(".db_{}.gen".format(s_class), 'w') as f:
+                            f.write(str(generation))
+                        SYNC[s_class] = (generation, None, 0)
+                    objs = list(DATA[s_class].items())
+                cls._write_snapshot(objs)
+                if STORAGE_SHARED:
+                    # Loads of every process wait on the file lock we hold.
+                    # Only the archive of the former generation is kept:
+                    # processes further behind reload the snapshot
+                    former = "{}.{}".format(journal_path, generation - 2)
+                    if path.exists(former):
+                        os.remove(former)
+                    if archivable:
+                        os.replace(old_path, "{}.{}".format(
+                            journal_path, generation - 1))
+                    elif path.exists(old_path):
+                        os.remove(old_path)
+                    return
+                # Not while load_from_file() is between reading the
+                # snapshot and replaying the rotated journal
+                with cls._lock().write():
+                    if path.exists(old_path):
+                        os.remove(old_path)
+        finally:
+            COMPACTING.discard(s_class)
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        if ENGINE is not None:
+            ENGINE.save(self)
+            return
+        with self._lock().write(), self._file_lock():
+            self.__class__._sync_locked()
+            DATA[s_class][self.id] = self
+            self.__class__._index_remove(self.id)
+            self.__class__._index_add(self)
+            self.__class__._bloom_compact()
+            if STORAGE_MODE == "journal":
+                # Journal order must match the order of the mutations
+                self.__class__._journal_append("save", self)
+        self.__class__._persist()
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        if ENGINE is not None:
+            ENGINE.remove(self)
+            return
+        with self._lock().write(), self._file_lock():
+            self.__class__._sync_locked()
+            if DATA[s_class].get(self.id) is None:
+                return
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            self.__class__._index_remove(self.id)
+            self.__class__._bloom_compact()
+            if STORAGE_MODE == "journal":
+                self.__class__._journal_append("remove", self)
+        self.__class__._persist()
+
+    @classmethod
+    def remove_many(cls, objs: Iterable[TypeVar('Base')]) -> int:
+        """ Remove several objects with a single write to disk
+        """
+        s_class = cls.__name__
+        objs = list(objs)
+        if ENGINE is not None:
+            return ENGINE.remove_many(cls, [obj.id for obj in objs])
+        with cls._lock().write(), cls._file_lock():
+            cls._sync_locked()
+            removed = []
+            for obj in objs:
+                if DATA[s_class].pop(obj.id, None) is None:
+                    continue
+                cls._index_remove(obj.id)
+                removed.append(obj)
+            if len(removed) == 0:
+                return 0
+            cls._bloom_compact()
+            if STORAGE_MODE == "journal":
+                cls._journal_append("remove", *removed)
+        cls._persist()
+        return len(removed)
+
+    @classmethod
+    def _persist(cls):
+        """ Write the objects of the class to disk unless STORAGE_MODE
+        already journaled the mutation
+        """
+        if STORAGE_MODE == "journal":
+            return
+        if FLUSH_INTERVAL > 0:
+            cls._mark_dirty()
+        else:
+            cls.save_to_file()
+
+    @classmethod
+    def _mark_dirty(cls):
+        """ Record a pending change for the background flusher
+        """
+        global FLUSHER
+        s_class = cls.__name__
+        with FLUSH_LOCK:
+            changes = DIRTY.get(s_class, (cls, 0))[1] + 1
+            DIRTY[s_class] = (cls, changes)
+            if FLUSHER is None:
+                FLUSHER = threading.Thread(target=_flush_loop, daemon=True)
+                FLUSHER.start()
+        if changes >= FLUSH_CHANGES:
+            FLUSH_EVENT.set()
+
+    @classmethod
+    def _index_add(cls, obj: TypeVar('Base')):
+        """ Register an object in the indexes of its class
+        """
+        s_class = cls.__name__
+        values = {}
+        for attr in cls._indexed_attributes:
+            value = getattr(obj, attr, None)
+            try:
+                index = INDEXES[s_class].setdefault(attr, {})
+                index.setdefault(value, {})[obj.id] = None
+            except TypeError:
+                # Unhashable values are only reachable by a full scan
+                continue
+            values[attr] = value
+            # Missing filters are built by _bloom_compact() from the
+            # complete indexes
+            bloom = BLOOMS.setdefault(s_class, {}).get(attr)
+            if bloom is not None:
+                bloom.add(value)
+        INDEXED_VALUES[s_class][obj.id] = values
+        pending = BLOOM_PENDING.get(s_class)
+        if pending is not None:
+            pending.append(values)
+        sorted_ids = SORTED_IDS.get(s_class)
+        if sorted_ids is not None:
+            # Re-saved: removed just before
+            if obj.id in sorted_ids[2]:
+                sorted_ids[2].discard(obj.id)
+            else:
+                sorted_ids[1].add(obj.id)
+
+    @classmethod
+    def _index_remove(cls, obj_id: str):
+        """ Unregister an object ID from the indexes of its class
+        """
+        s_class = cls.__name__
+        values = INDEXED_VALUES[s_class].pop(obj_id, None)
+        if values is None:
+            return
+        sorted_ids = SORTED_IDS.get(s_class)
+        if sorted_ids is not None:
+            if obj_id in sorted_ids[1]:
+                sorted_ids[1].discard(obj_id)
+            else:
+                sorted_ids[2].add(obj_id)
+        for attr, value in values.items():
+            obj_ids = INDEXES[s_class][attr][value]
+            del obj_ids[obj_id]
+            if len(obj_ids) == 0:
+                del INDEXES[s_class][attr][value]
+
+    @classmethod
+    def _bloom_compact(cls, force: bool = False):
+        """ Start a rebuild of the Bloom filters of the class when one is
+        missing or removed values make up most of it; under the write lock
+        """
+        s_class = cls.__name__
+        if BLOOM_FP_RATE <= 0 or not cls._indexed_attributes or \
+                s_class in BLOOM_PENDING:
+            return
+        blooms = BLOOMS.setdefault(s_class, {})
+        stale = force
+        for attr in cls._indexed_attributes:
+            bloom = blooms.get(attr)
+            if bloom is None or \
+                    bloom.count > 2 * len(INDEXES[s_class].get(attr, {})) \
+                    + 1024:
+                stale = True
+        if not stale:
+            return
+        # Copying the values is all that is done under the lock
+        values = {attr: list(INDEXES[s_class].get(attr, {}))
+                  for attr in cls._indexed_attributes}
+        pending = BLOOM_PENDING[s_class] = []
+        threading.Thread(target=cls._bloom_rebuild, args=(values, pending),
+                         daemon=True).start()
+
+    @classmethod
+    def _bloom_rebuild(cls, values: dict, pending: list):
+        """ Build Bloom filters of the values of each attribute, then swap
+        them in with the values indexed meanwhile
+        """
+        s_class = cls.__name__
+        try:
+            blooms = {attr: ScalableBloomFilter.of(attr_values,
+                                                   BLOOM_FP_RATE)
+                      for attr, attr_values in values.items()}
+        except Exception:
+            logging.getLogger(__name__).exception(
+                "Bloom filter rebuild of %s failed", s_class)
+            blooms = None
+        with cls._lock().write():
+            if BLOOM_PENDING.get(s_class) is not pending:
+                # Reloaded meanwhile: the values are not the current ones
+                return
+            del BLOOM_PENDING[s_class]
+            if blooms is None:
+                return
+            for indexed in pending:
+                for attr, value in indexed.items():
+                    blooms[attr].add(value)
+            BLOOMS[s_class] = blooms
+
+    @classmethod
+    def bloom_stats(cls) -> dict:
+        """ Size and memory of the Bloom filters of the class
+        """
+        return {attr: {"count": bloom.count,
+                       "layers": len(bloom.layers),
+                       "fp_rate": bloom.fp_rate,
+                       "size_in_bytes": bloom.size_in_bytes()}
+                for attr, bloom in BLOOMS.get(cls.__name__, {}).items()}
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        if ENGINE is not None:
+            return ENGINE.count(cls)
+        cls._sync()
+        with cls._lock().read():
+            return len(DATA[s_class].keys())
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -114,12 +689,89 @@ class Base():
         """
         return cls.search()
 
+    @classmethod
+    def page(cls, after: str, limit: int) -> List[TypeVar('Base')]:
+        """ Return at most limit objects in ID order, starting after the
+        ID after ("" for the first page)
+        """
+        s_class = cls.__name__
+        if ENGINE is not None:
+            return ENGINE.page(cls, after, limit)
+        cls._sync()
+        with cls._lock().read():
+            sorted_ids = SORTED_IDS.get(s_class)
+            if sorted_ids is not None and not sorted_ids[1] and \
+                    not sorted_ids[2]:
+                return cls._page_of(sorted_ids[0], after, limit)
+        with cls._lock().write():
+            return cls._page_of(cls._sorted_ids(), after, limit)
+
+    @classmethod
+    def _page_of(cls, ids: List[str], after: str,
+                 limit: int) -> List[TypeVar('Base')]:
+        """ page() on the sorted IDs of the class, under the class lock
+        """
+        start = bisect_right(ids, after)
+        return [DATA[cls.__name__][obj_id]
+                for obj_id in ids[start:start + limit]]
+
+    @classmethod
+    def _sorted_ids(cls) -> List[str]:
+        """ Sorted IDs of the class, built or brought up to date; under
+        the write lock
+        """
+        s_class = cls.__name__
+        sorted_ids = SORTED_IDS.get(s_class)
+        if sorted_ids is None:
+            ids = sorted(DATA[s_class])
+        else:
+            ids, added, removed = sorted_ids
+            if added or removed:
+                # Two sorted runs: merged in linear time
+                ids = [obj_id for obj_id in ids if obj_id not in removed]
+                ids.extend(sorted(added))
+                ids.sort()
+        SORTED_IDS[s_class] = [ids, set(), set()]
+        return ids
+
+    @classmethod
+    def iter_all(cls, batch_size: int = 1000) -> Iterator[TypeVar('Base')]:
+        """ Yield all objects, collecting batch_size of them at a time
+        under the read lock
+        """
+        s_class = cls.__name__
+        if ENGINE is not None:
+            yield from ENGINE.iter_all(cls, batch_size)
+            return
+        cls._sync()
+        position = 0
+        objs = None
+        while True:
+            with cls._lock().read():
+                if objs is None:
+                    objs = islice(DATA[s_class].values(), position, None)
+                try:
+                    batch = list(islice(objs, batch_size))
+                except RuntimeError:
+                    # Objects were added or removed between two batches:
+                    # resume at the same position of the new ordering
+                    objs = None
+                    continue
+            position += len(batch)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
         s_class = cls.__name__
-        return DATA[s_class].get(id)
+        if ENGINE is not None:
+            return ENGINE.get(cls, id)
+        cls._sync()
+        with cls._lock().read():
+            return DATA[s_class].get(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
@@ -133,5 +785,90 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        if ENGINE is not None:
+            return ENGINE.search(cls, attributes)
+        cls._sync()
+        blooms = BLOOMS.get(s_class, {})
+        for k, v in attributes.items():
+            try:
+                if k in blooms and v not in blooms[k]:
+                    # Certainly not stored
+                    return []
+            except TypeError:
+                continue
+        with cls._lock().read():
+            objs = DATA[s_class].values()
+            for k, v in attributes.items():
+                if k not in cls._indexed_attributes:
+                    continue
+                try:
+                    obj_ids = INDEXES[s_class].get(k, {}).get(v, {})
+                except TypeError:
+                    continue
+                objs = [DATA[s_class][obj_id] for obj_id in obj_ids]
+                break
+
+            return list(filter(_search, objs))
+
+
+def _timestamp(value) -> datetime:
+    """ Timestamp attribute from a datetime, a TIMESTAMP_FORMAT string
+    or None for the current time
+    """
+    if value is None:
+        return datetime.utcnow()
+    if type(value) is datetime:
+        return value
+    return _parse_timestamp(value)
+
+
+@lru_cache(maxsize=1024)
+def _parse_timestamp(value: str) -> datetime:
+    """ Parse a TIMESTAMP_FORMAT string; objects created or updated in
+    the same second share one datetime
+    """
+    return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def flush():
+    """ Save every class with pending write-behind changes
+    """
+    with FLUSH_WRITE_LOCK:
+        with FLUSH_LOCK:
+            dirty = list(DIRTY.values())
+            DIRTY.clear()
+        error = None
+        for cls, changes in dirty:
+            try:
+                cls.save_to_file()
+            except Exception as e:
+                # Still dirty: saved by the next flush
+                _redirty(cls, changes)
+                error = error or e
+        if error is not None:
+            raise error
+
+
+def _redirty(cls, changes: int):
+    """ Mark the changes of a failed save as pending again
+    """
+    with FLUSH_LOCK:
+        pending = DIRTY.get(cls.__name__, (cls, 0))[1]
+        DIRTY[cls.__name__] = (cls, pending + changes)
+
+
+def _flush_loop():
+    """ Background flusher of the write-behind mode
+    """
+    while True:
+        FLUSH_EVENT.wait(FLUSH_INTERVAL)
+        FLUSH_EVENT.clear()
+        try:
+            flush()
+        except Exception:
+            logging.getLogger(__name__).exception(
+                "Write-behind flush failed, retried in %s s", FLUSH_INTERVAL)
+
+
+atexit.register(flush)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+""" Bloom filters of the indexed attribute values
+
+A value missing from the filter is certainly not stored, so Base.search()
+answers those lookups without taking any lock. A value present may still
+be missing (false positive, at a rate of about fp_rate).
+"""
+from math import ceil, log
+from typing import Iterable
+
+
+class BloomFilter():
+    """ Fixed-size Bloom filter of hashable values
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        """ Initialize an empty filter sized for capacity values at a
+        false positive rate of fp_rate
+        """
+        self.capacity = max(capacity, 1)
+        self.fp_rate = fp_rate
+        bits = ceil(-self.capacity * log(fp_rate) / (log(2) ** 2))
+        self.bits = max(bits, 64)
+        self.hashes = max(int(round(self.bits / self.capacity * log(2))), 1)
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, value) -> Iterable[int]:
+        """ Bit positions of a value (double hashing)
+        """
+        h1 = hash(value)
+        h2 = hash((value, self.bits)) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, value):
+        """ Add a value; TypeError if it is unhashable
+        """
+        for position in self._positions(value):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value) -> bool:
+        """ False if the value was never added
+        """
+        array = self._array
+        for position in self._positions(value):
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def size_in_bytes(self) -> int:
+        """ Memory of the bit array
+        """
+        return len(self._array)
+
+
+class ScalableBloomFilter():
+    """ Bloom filter growing with its values: once a layer holds its
+    capacity, a new layer of twice that capacity takes the next values
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        """ Initialize an empty filter with a first layer of capacity
+        """
+        self.fp_rate = fp_rate
+        self.layers = [BloomFilter(capacity, fp_rate)]
+
+    @classmethod
+    def of(cls, values: Iterable, fp_rate: float,
+           min_capacity: int = 1024) -> 'ScalableBloomFilter':
+        """ Filter of a collection of values, sized for twice as many
+        """
+        values = list(values)
+        bloom = cls(max(2 * len(values), min_capacity), fp_rate)
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    @property
+    def count(self) -> int:
+        """ Number of values added
+        """
+        return sum(layer.count for layer in self.layers)
+
+    def add(self, value):
+        """ Add a value; TypeError if it is unhashable
+        """
+        layer = self.layers[-1]
+        if layer.count >= layer.capacity:
+            layer = BloomFilter(2 * layer.capacity, self.fp_rate)
+            # Readers iterate over the former list
+            self.layers = self.layers + [layer]
+        layer.add(value)
+
+    def __contains__(self, value) -> bool:
+        """ False if the value was never added
+        """
+        for layer in self.layers:
+            if value in layer:
+                return True
+        return False
+
+    def size_in_bytes(self) -> int:
+        """ Memory of the bit arrays
+        """
+        return sum(layer.size_in_bytes() for layer in self.layers)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+""" Reader/writer lock of the model store
+"""
+from contextlib import contextmanager
+import threading
+
+
+class ReadWriteLock():
+    """ Lock shared by any number of readers or held by a single writer
+
+    Waiting writers block new readers, so a steady stream of searches
+    cannot starve save() and remove(). The lock is not reentrant.
+    """
+
+    def __init__(self):
+        """ Initialize an unlocked ReadWriteLock
+        """
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """ Hold the lock as one of the readers
+        """
+        with self._cond:
+            while self._writer or self._writers_waiting > 0:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """ Hold the lock as the only writer
+        """
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers > 0:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
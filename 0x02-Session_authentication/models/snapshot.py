@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+""" Binary snapshot format of the file-backed model store
+
+A snapshot holds one column per attribute, so each attribute name is
+stored once, and keeps timestamps as datetime objects so loading does
+not go through strptime.
+"""
+from datetime import datetime
+from typing import Iterable, Iterator
+import io
+import json
+import pickle
+import sys
+
+
+MAGIC = b"HBTNSNAP1\n"
+TIMESTAMP_KEYS = ('created_at', 'updated_at')
+
+
+class _Unpickler(pickle.Unpickler):
+    """ Unpickler restricted to the types a snapshot may contain
+    """
+
+    def find_class(self, module: str, name: str):
+        """ Only datetime objects are rebuilt from globals
+        """
+        if module == "datetime" and name == "datetime":
+            return datetime
+        raise pickle.UnpicklingError("{}.{} is not allowed in a snapshot"
+                                     .format(module, name))
+
+
+def dump(rows: Iterable[dict], f: io.BufferedIOBase):
+    """ Write attribute dictionaries to a binary file
+    """
+    names = []
+    columns = {}
+    count = 0
+    for row in rows:
+        for name in row:
+            if name not in columns:
+                names.append(name)
+                columns[name] = [None] * count
+        for name in names:
+            columns[name].append(row.get(name))
+        count += 1
+
+    f.write(MAGIC)
+    pickle.dump((names, [columns[name] for name in names]), f,
+                protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(f: io.BufferedIOBase) -> Iterator[dict]:
+    """ Read attribute dictionaries from a binary file
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary snapshot")
+    names, columns = _Unpickler(f).load()
+    for values in zip(*columns):
+        yield dict(zip(names, values))
+
+
+def convert(json_path: str, bin_path: str) -> int:
+    """ Convert a .db_<Class>.json file to the binary format
+    and return the number of objects converted
+    """
+    from models.base import TIMESTAMP_FORMAT
+
+    with open(json_path, 'r') as f:
+        objs_json = json.load(f)
+
+    rows = []
+    for obj_json in objs_json.values():
+        row = dict(obj_json)
+        for key in TIMESTAMP_KEYS:
+            if row.get(key) is not None:
+                row[key] = datetime.strptime(row[key], TIMESTAMP_FORMAT)
+        rows.append(row)
+
+    with open(bin_path, 'wb') as f:
+        dump(rows, f)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    # python3 -m models.snapshot .db_User.json [.db_UserSession.json ...]
+    for json_path in sys.argv[1:]:
+        bin_path = json_path[:-len(".json")] + ".bin"
+        count = convert(json_path, bin_path)
+        print("{} => {}: {} objects".format(json_path, bin_path, count))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+""" SQLite storage engine of the models
+
+Selected with STORAGE_ENGINE=sqlite (database file: STORAGE_SQLITE_PATH,
+default .db.sqlite3). Each class gets a table holding the JSON of its
+objects, plus one indexed column per attribute of _indexed_attributes, so
+Base.search() on those attributes is an index lookup. Base delegates
+save/remove/remove_many/get/search/count to this engine instead of DATA.
+"""
+from typing import Iterator, List, TypeVar
+import json
+import sqlite3
+import sys
+import threading
+
+
+class SQLiteEngine():
+    """ Storage of Base objects in a SQLite database
+    """
+
+    def __init__(self, db_path: str):
+        """ Initialize the engine on a database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._tables = set()
+        self._tables_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the calling thread; the sqlite3 module keeps
+        a cache of prepared statements per connection
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30,
+                                   isolation_level=None,
+                                   cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _table(self, cls) -> str:
+        """ Quoted table name of a class, created on first use
+        """
+        table = '"{}"'.format(cls.__name__)
+        if cls.__name__ in self._tables:
+            return table
+        with self._tables_lock:
+            columns = "".join(', "{}"'.format(attr)
+                              for attr in cls._indexed_attributes)
+            conn = self._connection()
+            conn.execute("CREATE TABLE IF NOT EXISTS {} "
+                         "(id TEXT PRIMARY KEY, data TEXT NOT NULL{})"
+                         .format(table, columns))
+            for attr in cls._indexed_attributes:
+                conn.execute('CREATE INDEX IF NOT EXISTS "{}_{}" ON {} ("{}")'
+                             .format(cls.__name__, attr, table, attr))
+            self._tables.add(cls.__name__)
+        return table
+
+    def _row(self, cls, obj_json: dict) -> tuple:
+        """ Column values of an object for INSERT
+        """
+        values = [obj_json.get('id'), json.dumps(obj_json)]
+        for attr in cls._indexed_attributes:
+            values.append(obj_json.get(attr))
+        return tuple(values)
+
+    def _upsert_sql(self, cls) -> str:
+        """ INSERT OR REPLACE statement of a class
+        """
+        return "INSERT OR REPLACE INTO {} VALUES (?, ?{})".format(
+            self._table(cls), ", ?" * len(cls._indexed_attributes))
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or replace one object
+        """
+        cls = obj.__class__
+        self._connection().execute(self._upsert_sql(cls),
+                                   self._row(cls, obj.to_json(True)))
+
+    def insert_many(self, cls, objs_json: List[dict]):
+        """ Insert serialized objects in a single transaction
+        """
+        conn = self._connection()
+        sql = self._upsert_sql(cls)
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(sql, (self._row(cls, obj_json)
+                                   for obj_json in objs_json))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete one object
+        """
+        self._connection().execute(
+            "DELETE FROM {} WHERE id = ?".format(self._table(obj.__class__)),
+            (obj.id,))
+
+    def remove_many(self, cls, ids: List[str]) -> int:
+        """ Delete objects of a class by ID in a single transaction
+        """
+        conn = self._connection()
+        sql = "DELETE FROM {} WHERE id = ?".format(self._table(cls))
+        conn.execute("BEGIN")
+        try:
+            removed = conn.executemany(sql, ((id,) for id in ids)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def get(self, cls, id: str) -> TypeVar('Base'):
+        """ Object of a class by ID, or None
+        """
+        row = self._connection().execute(
+            "SELECT data FROM {} WHERE id = ?".format(self._table(cls)),
+            (id,)).fetchone()
+        if row is None:
+            return None
+        return cls(**json.loads(row[0]))
+
+    def page(self, cls, after: str, limit: int) -> List[TypeVar('Base')]:
+        """ At most limit objects of a class in ID order, after the ID
+        after: a seek on the primary key
+        """
+        rows = self._connection().execute(
+            "SELECT data FROM {} WHERE id > ? ORDER BY id LIMIT ?"
+            .format(self._table(cls)), (after, limit))
+        return [cls(**json.loads(row[0])) for row in rows]
+
+    def iter_all(self, cls, batch_size: int) -> Iterator[TypeVar('Base')]:
+        """ All objects of a class, fetched batch_size rows at a time
+        """
+        cursor = self._connection().execute(
+            "SELECT data FROM {} ORDER BY rowid".format(self._table(cls)))
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield cls(**json.loads(row[0]))
+        finally:
+            cursor.close()
+
+    def count(self, cls) -> int:
+        """ Number of objects of a class
+        """
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM {}".format(self._table(cls))).fetchone()[0]
+
+    def search(self, cls, attributes: dict) -> List[TypeVar('Base')]:
+        """ Objects of a class with matching attributes; indexed
+        attributes are filtered by SQLite, the others in Python
+        """
+        where = []
+        params = []
+        rest = {}
+        for k, v in attributes.items():
+            if k in cls._indexed_attributes and \
+                    (v is None or type(v) in (str, int, float)):
+                where.append('"{}" IS ?'.format(k))
+                params.append(v)
+            else:
+                rest[k] = v
+
+        sql = "SELECT data FROM {}".format(self._table(cls))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        result = []
+        for row in self._connection().execute(sql, params):
+            obj = cls(**json.loads(row[0]))
+            if all(getattr(obj, k) == v for k, v in rest.items()):
+                result.append(obj)
+        return result
+
+
+if __name__ == "__main__":
+    # python3 -m models.sqlite_engine .db_User.json [.db_UserSession.json]
+    import os
+    from models.base import Base
+    import models.user
+    import models.user_session
+
+    engine = SQLiteEngine(os.getenv("STORAGE_SQLITE_PATH", ".db.sqlite3"))
+    classes = {cls.__name__: cls for cls in Base.__subclasses__()}
+    for json_path in sys.argv[1:]:
+        s_class = os.path.basename(json_path)[len(".db_"):-len(".json")]
+        with open(json_path, 'r') as f:
+            objs_json = json.load(f)
+        engine.insert_many(classes[s_class], list(objs_json.values()))
+        print("{} => {}: {} {} objects".format(
+            json_path, engine.db_path, len(objs_json), s_class))
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""TokenRevocation model stores the revocations of signed session
+tokens in the file-based database, so every worker process and every
+restart sees them, inheriting from Base for the persistence
+functionality"""
+from datetime import datetime, timedelta
+from models.base import Base
+
+
+class TokenRevocation(Base):
+    """A revoked token (token_id) or every token of a user issued
+    until revoked_before (user_id)."""
+    _indexed_attributes = ('token_id', 'user_id')
+    __slots__ = ('token_id', 'user_id', 'revoked_before')
+
+    def __init__(self, *args: list, **kwargs: dict):
+        """Initialize a TokenRevocation instance with token_id, or
+        user_id and revoked_before."""
+        super().__init__(*args, **kwargs)
+        self.token_id = kwargs.get("token_id")
+        self.user_id = kwargs.get("user_id")
+        self.revoked_before = kwargs.get("revoked_before")
+
+    @classmethod
+    def purge_expired(cls, duration: int) -> int:
+        """Remove the revocations made more than duration seconds ago,
+        whose tokens have all expired, with a single write to disk;
+        return how many were removed."""
+        if duration <= 0:
+            return 0
+        # created_at of the models is in UTC
+        limit = datetime.utcnow() - timedelta(seconds=duration)
+        # updated_at: a user revocation is saved again when renewed
+        expired = [revocation for revocation in cls.iter_all()
+                   if revocation.updated_at < limit]
+        return cls.remove_many(expired)
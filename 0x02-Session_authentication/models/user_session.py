@@ -2,15 +2,30 @@
 """UserSession model will store user sessions
 in the file-based database,
 inheriting from Base for the persistence functionality"""
+from datetime import datetime, timedelta
 from models.base import Base
 
 
 class UserSession(Base):
     """UserSession model for storing sessions in the database."""
-    
+    _indexed_attributes = ('session_id', 'user_id')
+    __slots__ = ('user_id', 'session_id')
+
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize a UserSession instance with user_id
         and session_id."""
         super().__init__(*args, **kwargs)
         self.user_id = kwargs.get("user_id")
         self.session_id = kwargs.get("session_id")
+
+    @classmethod
+    def purge_expired(cls, duration: int) -> int:
+        """Remove the sessions created more than duration seconds ago,
+        with a single write to disk; return how many were removed."""
+        if duration <= 0:
+            return 0
+        # created_at of the models is in UTC
+        limit = datetime.utcnow() - timedelta(seconds=duration)
+        expired = [session for session in cls.iter_all()
+                   if session.created_at < limit]
+        return cls.remove_many(expired)
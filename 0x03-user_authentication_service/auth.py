@@ -3,8 +3,13 @@
 _hash_password method using bcrypt.hashpw
 to hash a password
 """
+import logging
+import os
 import bcrypt
 
+# bcrypt default, used when BCRYPT_COST is unset or invalid
+DEFAULT_COST = 12
+
 
 def _hash_password(password: str) -> bytes:
     """
@@ -19,10 +24,29 @@ def _hash_password(password: str) -> bytes:
     if not isinstance(password, str):
         raise TypeError("Password must be a string")
 
-    # Generate a salt
-    salt = bcrypt.gensalt()
+    # Generate a salt, with the cost calibrated for the deployment
+    # hardware when BCRYPT_COST is set (python3 encrypt_password.py in
+    # 0x00-personal_data reports it)
+    salt = bcrypt.gensalt(_bcrypt_cost())
 
     # Hash the password using bcrypt and the generated salt
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
 
     return hashed_password
+
+
+def _bcrypt_cost() -> int:
+    """
+    Returns BCRYPT_COST if it is a valid bcrypt cost (4 to 31),
+    DEFAULT_COST otherwise.
+    """
+    try:
+        cost = int(os.getenv("BCRYPT_COST") or DEFAULT_COST)
+    except ValueError:
+        cost = 0
+    if not 4 <= cost <= 31:
+        logging.getLogger(__name__).warning(
+            "Invalid BCRYPT_COST %r: using %d", os.getenv("BCRYPT_COST"),
+            DEFAULT_COST)
+        return DEFAULT_COST
+    return cost